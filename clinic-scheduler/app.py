@@ -1,17 +1,27 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
 import os
-import json
 import traceback
 from datetime import datetime
 import uuid
 import logging
+import queue
+import hashlib
+from functools import lru_cache
+import orjson
+from io import BytesIO
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 from config.settings import Config
-from modules.genetic_scheduler_v2 import GeneticSchedulerV2 as GeneticScheduler
+from modules.genetic_scheduler_v2 import GeneticSchedulerV2 as GeneticScheduler, run_scheduler, warm_up_worker
 from modules.validators import InputValidator
 from modules.data_handler import DataHandler
 from modules.export_handler import ExportHandler
 from modules.r1_scheduler import R1Scheduler
+from modules.cache import TTLCache
+from modules.json_provider import OrjsonProvider
 
 # Configure logging
 logging.basicConfig(
@@ -21,13 +31,255 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.config.from_object(Config)
 
-# Create necessary directories
-os.makedirs('data/temp', exist_ok=True)
+# Task state, kept for TASK_TTL after the last status change. State lives
+# in this process, so the app must run as a single gunicorn worker
+running_tasks = TTLCache(maxsize=Config.TASK_CACHE_SIZE, ttl=Config.TASK_TTL)
 
-# Store running tasks
-running_tasks = {}
+# Open /api/progress-stream/<task_id> streams per task; each stream has its
+# own queue and gets a copy of every message published while it is open
+progress_subscribers = {}
+_progress_subscribers_lock = threading.Lock()
+
+# Background workers that follow a run and export its results
+scheduler_executor = ThreadPoolExecutor(max_workers=Config.SCHEDULER_MAX_WORKERS)
+
+# One slot per running or waiting task; submissions are refused once all are taken
+_scheduler_slots = threading.BoundedSemaphore(Config.SCHEDULER_MAX_WORKERS + Config.SCHEDULER_MAX_PENDING)
+
+# The CPU-bound GA itself runs in worker processes so it never holds the
+# GIL that request and progress-stream threads need. Replaced when a dead
+# worker (e.g. killed for memory) breaks it
+mp_context = multiprocessing.get_context('spawn')
+ga_process_pool = ProcessPoolExecutor(max_workers=Config.SCHEDULER_MAX_WORKERS, mp_context=mp_context)
+_ga_process_pool_lock = threading.Lock()
+
+# Started on first use; hands out queues GA processes report progress through
+_progress_manager = None
+_progress_manager_lock = threading.Lock()
+
+# Shared pool for generating a run's CSV exports side by side
+export_executor = ThreadPoolExecutor(max_workers=Config.EXPORT_MAX_WORKERS)
+
+# Finished CSV exports served from memory: filename -> bytes
+export_cache = TTLCache(maxsize=Config.EXPORT_CACHE_SIZE, ttl=Config.EXPORT_CACHE_TTL)
+
+# Validation and parsed personnel for recently submitted payloads
+input_cache = TTLCache(maxsize=Config.INPUT_CACHE_SIZE, ttl=Config.INPUT_CACHE_TTL)
+
+# Fixed health check slots for 健康 R1, shared read-only across requests
+R1_HEALTH_CHECK_TEMPLATE = (
+    {'day': 'Monday', 'time': 'Morning', 'room': '體檢1'},
+    {'day': 'Tuesday', 'time': 'Morning', 'room': '體檢1'},
+    {'day': 'Tuesday', 'time': 'Afternoon', 'room': '體檢1'},
+    {'day': 'Wednesday', 'time': 'Afternoon', 'room': '體檢1'},
+    {'day': 'Thursday', 'time': 'Morning', 'room': '體檢1'},
+    {'day': 'Thursday', 'time': 'Afternoon', 'room': '體檢1'},
+    {'day': 'Friday', 'time': 'Morning', 'room': '體檢1'},
+    {'day': 'Friday', 'time': 'Afternoon', 'room': '體檢1'}
+)
+
+def get_rules():
+    """Return the shared read-only rules, re-reading the file only after it changes"""
+    return DataHandler.load_rules_from_json(Config.RULES_FILE)
+
+def sse_event(payload) -> bytes:
+    """Encode one Server-Sent Events data message straight to bytes"""
+    return b'data: ' + orjson.dumps(payload, option=OrjsonProvider.option) + b'\n\n'
+
+def build_export(generate_csv):
+    """Generate one CSV export as BOM-prefixed bytes"""
+    return generate_csv().encode('utf-8-sig')
+
+def validate_and_parse(data):
+    """Validate personnel input and parse it, reusing results for a repeated payload"""
+    payload = orjson.dumps(
+        {'personnel': data.get('personnel'), 'personnel_counts': data.get('personnel_counts')},
+        option=orjson.OPT_SORT_KEYS
+    )
+    key = hashlib.blake2b(payload, digest_size=16).hexdigest()
+    
+    cached = input_cache.get(key)
+    if cached is None:
+        validation_result = InputValidator().validate_input(data)
+        personnel_data = DataHandler.parse_personnel_data(data) if validation_result['valid'] else None
+        cached = (validation_result, personnel_data)
+        input_cache.set(key, cached)
+    return cached
+
+@lru_cache(maxsize=Config.VALIDATE_CACHE_SIZE)
+def validate_partial_body(body):
+    """Validate a raw real-time validation body; repeated bodies reuse the result"""
+    return InputValidator().validate_partial(orjson.loads(body))
+
+def subscribe_progress(task_id):
+    """Open a queue receiving the task's progress messages from now on"""
+    subscriber = queue.Queue()
+    with _progress_subscribers_lock:
+        progress_subscribers.setdefault(task_id, set()).add(subscriber)
+    return subscriber
+
+def unsubscribe_progress(task_id, subscriber):
+    """Stop delivering the task's progress messages to a queue"""
+    with _progress_subscribers_lock:
+        subscribers = progress_subscribers.get(task_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del progress_subscribers[task_id]
+
+def publish_progress(task_id, message):
+    """Deliver a progress message to every stream following the task"""
+    with _progress_subscribers_lock:
+        subscribers = tuple(progress_subscribers.get(task_id, ()))
+    for subscriber in subscribers:
+        subscriber.put(message)
+
+def get_progress_manager():
+    """Return the shared multiprocessing manager, starting it on first use"""
+    global _progress_manager
+    with _progress_manager_lock:
+        if _progress_manager is None:
+            _progress_manager = mp_context.Manager()
+        return _progress_manager
+
+def replace_ga_process_pool(broken_pool):
+    """Swap a broken GA process pool for a fresh one and return the current pool"""
+    global ga_process_pool
+    with _ga_process_pool_lock:
+        # Another task may already have replaced it
+        if ga_process_pool is broken_pool:
+            ga_process_pool = ProcessPoolExecutor(max_workers=Config.SCHEDULER_MAX_WORKERS, mp_context=mp_context)
+            broken_pool.shutdown(wait=False, cancel_futures=True)
+        return ga_process_pool
+
+def prewarm_ga_workers():
+    """Start the progress manager and GA worker processes ahead of the first request"""
+    get_progress_manager()
+    for _ in range(Config.SCHEDULER_MAX_WORKERS):
+        ga_process_pool.submit(warm_up_worker)
+
+def run_schedule_task(task_id, scheduler, personnel_data):
+    """Run genetic algorithm and export CSV files for a queued task"""
+    def report_progress(update):
+        """Record and relay a progress update; False once the task state is gone"""
+        task = running_tasks.get(task_id)
+        if task is None:
+            return False
+        # Store a new entry so every update also renews the task's TTL
+        running_tasks.set(task_id, {**task, 'progress': update['progress']})
+        publish_progress(task_id, {'type': 'progress', **update})
+        return True
+    
+    pool = ga_process_pool
+    try:
+        # Run genetic algorithm in a worker process, relaying its progress
+        manager = get_progress_manager()
+        progress_queue = manager.Queue()
+        stop_event = manager.Event()
+        args = (run_scheduler, scheduler, progress_queue, Config.MAX_PROCESSING_TIME, stop_event)
+        try:
+            future = pool.submit(*args)
+        except BrokenProcessPool:
+            # A worker died after the last run; start over with fresh workers
+            pool = replace_ga_process_pool(pool)
+            future = pool.submit(*args)
+        while True:
+            try:
+                update = progress_queue.get(timeout=0.5)
+            except queue.Empty:
+                if future.done():
+                    break
+                continue
+            if not report_progress(update):
+                # Evicted or expired, so nobody can collect the result; free the worker
+                logger.warning(f"Schedule task {task_id} expired while running, stopping it")
+                if not future.cancel():
+                    stop_event.set()
+                return
+        result = future.result()
+        
+        if not result['success']:
+            running_tasks[task_id] = {
+                'status': 'failed',
+                'error': result['error'],
+                'details': result.get('details', {})
+            }
+            return
+        
+        # Generate export files
+        exporter = ExportHandler(result['schedule'], personnel_data)
+        
+        # Name exports by task so concurrent runs stay apart
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        suffix = f"{timestamp}_{task_id[:8]}"
+        filenames = {
+            'basic': f"basic_schedule_{suffix}.csv",
+            'personal': f"personal_schedule_{suffix}.csv",
+            'statistics': f"statistics_{suffix}.csv"
+        }
+        
+        # Generate all CSV formats concurrently and keep them in memory
+        futures = {
+            'basic': export_executor.submit(build_export, exporter.generate_basic_csv),
+            'personal': export_executor.submit(build_export, exporter.generate_personal_csv),
+            'statistics': export_executor.submit(build_export, exporter.generate_statistics_csv)
+        }
+        for file_type, future in futures.items():
+            export_cache.set(filenames[file_type], future.result())
+        
+        running_tasks[task_id] = {
+            'status': 'completed',
+            'progress': 100,
+            'files': filenames,
+            'result': {
+                'success': True,
+                'task_id': task_id,
+                'schedule': result['schedule'],
+                'statistics': result['statistics'],
+                'files': filenames
+            }
+        }
+    except BrokenProcessPool:
+        # The worker running this task died; later tasks get a fresh pool
+        logger.exception(f"GA worker died during schedule task {task_id}")
+        replace_ga_process_pool(pool)
+        running_tasks[task_id] = {
+            'status': 'failed',
+            'error': 'Scheduler worker stopped unexpectedly, please try again'
+        }
+    except Exception as e:
+        logger.exception(f"Schedule task {task_id} failed")
+        running_tasks[task_id] = {
+            'status': 'failed',
+            'error': f'System error: {str(e)}'
+        }
+    finally:
+        task = running_tasks.get(task_id, {'status': 'failed', 'error': 'Task expired'})
+        publish_progress(task_id, {'type': 'done', **task})
+
+def submit_schedule_task(scheduler, personnel_data):
+    """Queue a scheduler run and return its task ID, or None when the queue is full"""
+    if not _scheduler_slots.acquire(blocking=False):
+        return None
+    task_id = str(uuid.uuid4())
+    running_tasks[task_id] = {'status': 'running', 'progress': 0}
+    try:
+        future = scheduler_executor.submit(run_schedule_task, task_id, scheduler, personnel_data)
+    except BaseException:
+        _scheduler_slots.release()
+        raise
+    future.add_done_callback(lambda _: _scheduler_slots.release())
+    return task_id
+
+def scheduler_busy_response():
+    """503 response for a run refused because too many are already queued"""
+    return jsonify({
+        'success': False,
+        'error': 'Scheduler is busy, please try again shortly'
+    }), 503
 
 @app.route('/')
 def index():
@@ -49,9 +301,8 @@ def generate_schedule():
         data = request.json
         logger.info(f"Received schedule request with data keys: {list(data.keys()) if data else 'None'}")
         
-        # Validate input
-        validator = InputValidator()
-        validation_result = validator.validate_input(data)
+        # Validate and parse input (cached for repeat submissions)
+        validation_result, personnel_data = validate_and_parse(data)
         
         if not validation_result['valid']:
             return jsonify({
@@ -59,12 +310,8 @@ def generate_schedule():
                 'error': validation_result['errors']
             }), 400
         
-        # Parse personnel data
-        personnel_data = DataHandler.parse_personnel_data(data)
-        
         # Load rules
-        with open('data/rules.json', 'r', encoding='utf-8') as f:
-            rules = json.load(f)
+        rules = get_rules()
         
         # Initialize genetic scheduler
         scheduler = GeneticScheduler(
@@ -72,68 +319,16 @@ def generate_schedule():
             rules=rules
         )
         
-        # Generate task ID for progress tracking
-        task_id = str(uuid.uuid4())
-        running_tasks[task_id] = {'status': 'running', 'progress': 0}
-        
-        # Run genetic algorithm
-        result = scheduler.run()
+        # Queue genetic algorithm run; clients follow /api/progress/<task_id>
+        task_id = submit_schedule_task(scheduler, personnel_data)
+        if task_id is None:
+            return scheduler_busy_response()
         
-        if result['success']:
-            # Generate export files
-            exporter = ExportHandler(result['schedule'], personnel_data)
-            
-            # Generate all CSV formats
-            basic_csv = exporter.generate_basic_csv()
-            personal_csv = exporter.generate_personal_csv()
-            statistics_csv = exporter.generate_statistics_csv()
-            
-            # Save files temporarily
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            basic_path = f"data/temp/basic_schedule_{timestamp}.csv"
-            personal_path = f"data/temp/personal_schedule_{timestamp}.csv"
-            statistics_path = f"data/temp/statistics_{timestamp}.csv"
-            
-            with open(basic_path, 'w', encoding='utf-8-sig') as f:
-                f.write(basic_csv)
-            with open(personal_path, 'w', encoding='utf-8-sig') as f:
-                f.write(personal_csv)
-            with open(statistics_path, 'w', encoding='utf-8-sig') as f:
-                f.write(statistics_csv)
-            
-            running_tasks[task_id] = {
-                'status': 'completed',
-                'progress': 100,
-                'files': {
-                    'basic': basic_path,
-                    'personal': personal_path,
-                    'statistics': statistics_path
-                }
-            }
-            
-            return jsonify({
-                'success': True,
-                'task_id': task_id,
-                'schedule': result['schedule'],
-                'statistics': result['statistics'],
-                'files': {
-                    'basic': f"basic_schedule_{timestamp}.csv",
-                    'personal': f"personal_schedule_{timestamp}.csv",
-                    'statistics': f"statistics_{timestamp}.csv"
-                }
-            })
-        else:
-            running_tasks[task_id] = {
-                'status': 'failed',
-                'error': result['error']
-            }
-            
-            return jsonify({
-                'success': False,
-                'task_id': task_id,
-                'error': result['error'],
-                'details': result.get('details', {})
-            }), 400
+        return jsonify({
+            'success': True,
+            'task_id': task_id,
+            'status': 'running'
+        }), 202
             
     except Exception as e:
         traceback.print_exc()
@@ -146,13 +341,13 @@ def generate_schedule():
 def download_file(format, filename):
     """Download specific CSV format"""
     try:
-        file_path = f"data/temp/{filename}"
+        data = export_cache.get(filename)
         
-        if not os.path.exists(file_path):
+        if data is None:
             return jsonify({'error': 'File not found'}), 404
         
         return send_file(
-            file_path,
+            BytesIO(data),
             as_attachment=True,
             download_name=filename,
             mimetype='text/csv'
@@ -167,18 +362,20 @@ def download_zip(task_id):
         if task_id not in running_tasks or running_tasks[task_id]['status'] != 'completed':
             return jsonify({'error': 'Task not found or not completed'}), 404
         
-        files = running_tasks[task_id]['files']
+        files = {}
+        for file_type, filename in running_tasks[task_id]['files'].items():
+            data = export_cache.get(filename)
+            if data is None:
+                return jsonify({'error': 'Files expired, please generate the schedule again'}), 404
+            files[file_type] = data
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Create ZIP file
+        # Stream the ZIP archive as each CSV is compressed
         exporter = ExportHandler(None, None)
-        zip_path = exporter.create_zip_bundle(files, timestamp)
-        
-        return send_file(
-            zip_path,
-            as_attachment=True,
-            download_name=f"clinic_schedule_{timestamp}.zip",
-            mimetype='application/zip'
+        return Response(
+            exporter.stream_zip_bundle(files),
+            mimetype='application/zip',
+            headers={'Content-Disposition': f'attachment; filename=clinic_schedule_{timestamp}.zip'}
         )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -194,9 +391,8 @@ def validate_input():
                 'error': 'Request must contain JSON data'
             }), 400
             
-        data = request.json
-        validator = InputValidator()
-        result = validator.validate_partial(data)
+        # Keystroke-driven requests repeat often; cache on the raw body
+        result = validate_partial_body(request.get_data())
         
         return jsonify(result)
     except Exception as e:
@@ -211,6 +407,56 @@ def check_progress(task_id):
     
     return jsonify(running_tasks[task_id])
 
+@app.route('/api/progress-stream/<task_id>')
+def stream_progress(task_id):
+    """Stream genetic algorithm progress as Server-Sent Events"""
+    if task_id not in running_tasks:
+        return jsonify({'error': 'Task not found'}), 404
+    
+    def final_event():
+        """The done message for a finished task, or None while it still runs"""
+        task = running_tasks.get(task_id)
+        if task is None:
+            return sse_event({'type': 'done', 'status': 'failed', 'error': 'Task expired'})
+        if task['status'] != 'running':
+            return sse_event({'type': 'done', **task})
+        return None
+    
+    def stream():
+        # Subscribe before checking state so a finish in between is never missed
+        subscriber = subscribe_progress(task_id)
+        try:
+            event = final_event()
+            if event is not None:
+                # Already finished, e.g. a reconnect after completion
+                yield event
+                return
+            
+            while True:
+                try:
+                    message = subscriber.get(timeout=Config.SSE_HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    event = final_event()
+                    if event is not None:
+                        yield event
+                        return
+                    # Comment line keeps proxies from closing an idle connection
+                    yield b": heartbeat\n\n"
+                    continue
+                
+                yield sse_event(message)
+                
+                if message['type'] == 'done':
+                    return
+        finally:
+            unsubscribe_progress(task_id, subscriber)
+    
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/personnel/update', methods=['POST'])
 def update_personnel():
     """Update personnel count dynamically"""
@@ -248,9 +494,8 @@ def preview_r1_schedule():
         data = request.json
         logger.info(f"Received preview-r1 request with data keys: {list(data.keys()) if data else 'None'}")
         
-        # Validate input
-        validator = InputValidator()
-        validation_result = validator.validate_input(data)
+        # Validate and parse input (cached for repeat submissions)
+        validation_result, personnel_data = validate_and_parse(data)
         
         if not validation_result['valid']:
             return jsonify({
@@ -258,9 +503,6 @@ def preview_r1_schedule():
                 'error': validation_result['errors']
             }), 400
         
-        # Parse personnel data
-        personnel_data = DataHandler.parse_personnel_data(data)
-        
         # Get R1 personnel only
         r1_personnel = []
         for person_id, person_data in personnel_data.get('R1', {}).items():
@@ -284,16 +526,7 @@ def preview_r1_schedule():
         for person in r1_personnel:
             if person['rotation_unit'] == '健康':
                 # Fixed health check schedule for 健康 R1
-                health_check_assignments[person['id']] = [
-                    {'day': 'Monday', 'time': 'Morning', 'room': '體檢1'},
-                    {'day': 'Tuesday', 'time': 'Morning', 'room': '體檢1'},
-                    {'day': 'Tuesday', 'time': 'Afternoon', 'room': '體檢1'},
-                    {'day': 'Wednesday', 'time': 'Afternoon', 'room': '體檢1'},
-                    {'day': 'Thursday', 'time': 'Morning', 'room': '體檢1'},
-                    {'day': 'Thursday', 'time': 'Afternoon', 'room': '體檢1'},
-                    {'day': 'Friday', 'time': 'Morning', 'room': '體檢1'},
-                    {'day': 'Friday', 'time': 'Afternoon', 'room': '體檢1'}
-                ]
+                health_check_assignments[person['id']] = R1_HEALTH_CHECK_TEMPLATE
         
         # Convert to frontend-friendly format
         r1_schedule = {
@@ -302,48 +535,39 @@ def preview_r1_schedule():
         }
         
         # Use the r1_assignments we just generated
+        r1_by_id = {p['id']: p for p in r1_personnel}
         for person_id, (day, room) in r1_assignments.items():
             r1_schedule['clinic_assignments'][person_id] = {
                 'day': day,
                 'time': 'Afternoon',
                 'room': room,
-                'person_info': next((p for p in r1_personnel if p['id'] == person_id), None)
+                'person_info': r1_by_id.get(person_id)
             }
         
         # Get R4 fixed schedules
         r4_fixed_schedules = {}
         for person_id, person_data in personnel_data.get('R4', {}).items():
-            if 'fixed_schedule' in person_data and person_data['fixed_schedule'] is not None:
-                fixed = person_data['fixed_schedule']
+            fixed = person_data.get('fixed_schedule')
+            if fixed is not None:
                 # Check if fixed schedule has the required fields
-                if isinstance(fixed, dict) and 'day' in fixed and 'time_slot' in fixed:
-                    r4_fixed_schedules[person_id] = {
-                        'day': fixed['day'],
-                        'time': fixed['time_slot'],
-                        'room': fixed.get('room', None),  # Use specified room if available
-                        'person_info': {
-                            'id': person_id,
-                            'name': person_data.get('name', ''),
-                            'level': 'R4',
-                            'rotation_unit': person_data['rotation_unit']
-                        }
-                    }
-                else:
+                if not (isinstance(fixed, dict) and 'day' in fixed and 'time_slot' in fixed):
                     logger.warning(f"Invalid fixed_schedule format for {person_id}: {fixed}")
-            # Check for teaching_exempt R4s (Tuesday teaching)
+                    continue
+                # Use specified room if available
+                entry = {'day': fixed['day'], 'time': fixed['time_slot'], 'room': fixed.get('room')}
             elif not person_data.get('teaching_exempt', False):
-                # Non-exempt R4s have Tuesday teaching
-                r4_fixed_schedules[person_id] = {
-                    'day': 'Tuesday',
-                    'time': 'Both',  # Both morning and afternoon
-                    'room': 'R4教學',
-                    'person_info': {
-                        'id': person_id,
-                        'name': person_data.get('name', ''),
-                        'level': 'R4',
-                        'rotation_unit': person_data['rotation_unit']
-                    }
-                }
+                # Non-exempt R4s have Tuesday teaching, both morning and afternoon
+                entry = {'day': 'Tuesday', 'time': 'Both', 'room': 'R4教學'}
+            else:
+                continue
+            
+            entry['person_info'] = {
+                'id': person_id,
+                'name': person_data.get('name', ''),
+                'level': 'R4',
+                'rotation_unit': person_data['rotation_unit']
+            }
+            r4_fixed_schedules[person_id] = entry
         
         return jsonify({
             'success': True,
@@ -376,9 +600,8 @@ def generate_schedule_with_r1():
         r1_schedule = data.get('r1_schedule', {})
         r4_fixed_schedules = data.get('r4_fixed_schedules', {})
         
-        # Validate input
-        validator = InputValidator()
-        validation_result = validator.validate_input(data)
+        # Validate and parse input (cached for repeat submissions)
+        validation_result, personnel_data = validate_and_parse(data)
         
         if not validation_result['valid']:
             return jsonify({
@@ -386,12 +609,8 @@ def generate_schedule_with_r1():
                 'error': validation_result['errors']
             }), 400
         
-        # Parse personnel data
-        personnel_data = DataHandler.parse_personnel_data(data)
-        
         # Load rules
-        with open('data/rules.json', 'r', encoding='utf-8') as f:
-            rules = json.load(f)
+        rules = get_rules()
         
         # Initialize genetic scheduler
         scheduler = GeneticScheduler(
@@ -419,68 +638,16 @@ def generate_schedule_with_r1():
             # Just need to ensure they are properly set in the scheduler
             scheduler.r4_fixed_schedule = scheduler._create_r4_fixed_schedule()
         
-        # Generate task ID for progress tracking
-        task_id = str(uuid.uuid4())
-        running_tasks[task_id] = {'status': 'running', 'progress': 0}
-        
-        # Run genetic algorithm with modified R1 assignments
-        result = scheduler.run()
+        # Queue genetic algorithm run; clients follow /api/progress/<task_id>
+        task_id = submit_schedule_task(scheduler, personnel_data)
+        if task_id is None:
+            return scheduler_busy_response()
         
-        if result['success']:
-            # Generate export files
-            exporter = ExportHandler(result['schedule'], personnel_data)
-            
-            # Generate all CSV formats
-            basic_csv = exporter.generate_basic_csv()
-            personal_csv = exporter.generate_personal_csv()
-            statistics_csv = exporter.generate_statistics_csv()
-            
-            # Save files temporarily
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            basic_path = f"data/temp/basic_schedule_{timestamp}.csv"
-            personal_path = f"data/temp/personal_schedule_{timestamp}.csv"
-            statistics_path = f"data/temp/statistics_{timestamp}.csv"
-            
-            with open(basic_path, 'w', encoding='utf-8-sig') as f:
-                f.write(basic_csv)
-            with open(personal_path, 'w', encoding='utf-8-sig') as f:
-                f.write(personal_csv)
-            with open(statistics_path, 'w', encoding='utf-8-sig') as f:
-                f.write(statistics_csv)
-            
-            running_tasks[task_id] = {
-                'status': 'completed',
-                'progress': 100,
-                'files': {
-                    'basic': basic_path,
-                    'personal': personal_path,
-                    'statistics': statistics_path
-                }
-            }
-            
-            return jsonify({
-                'success': True,
-                'task_id': task_id,
-                'schedule': result['schedule'],
-                'statistics': result['statistics'],
-                'files': {
-                    'basic': f"basic_schedule_{timestamp}.csv",
-                    'personal': f"personal_schedule_{timestamp}.csv",
-                    'statistics': f"statistics_{timestamp}.csv"
-                }
-            })
-        else:
-            running_tasks[task_id] = {
-                'status': 'failed',
-                'error': result['error']
-            }
-            
-            return jsonify({
-                'success': False,
-                'task_id': task_id,
-                'error': result['error'],
-                'details': result.get('details', {})
-            }), 400
+        return jsonify({
+            'success': True,
+            'task_id': task_id,
+            'status': 'running'
+        }), 202
             
     except Exception as e:
         traceback.print_exc()
@@ -507,5 +674,7 @@ def health_check():
     }), 200
 
 if __name__ == '__main__':
+    # Under gunicorn, gunicorn.conf.py pre-warms from its post_worker_init hook
+    prewarm_ga_workers()
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
@@ -1,6 +1,8 @@
+import functools
 import os
+import types
 
-class Config:
+class DevelopmentConfig:
     """Application configuration"""
     
     # Flask settings
@@ -13,7 +15,7 @@ class Config:
     
     # Genetic Algorithm default parameters
     GA_DEFAULT_POPULATION_SIZE = 300  # Reduced for 1 week
-    GA_DEFAULT_GENERATIONS = 500  # Reduced for 1 week
+    GA_DEFAULT_GENERATIONS = 200  # Convergence usually stops runs well before this
     GA_DEFAULT_ELITE_PERCENTAGE = 0.1
     GA_DEFAULT_MUTATION_RATE = 0.15
     GA_DEFAULT_CROSSOVER_RATE = 0.8
@@ -22,14 +24,20 @@ class Config:
     GA_DEFAULT_PARALLEL_POPULATIONS = 3
     GA_DEFAULT_MIGRATION_INTERVAL = 20
     GA_DEFAULT_MIGRATION_SIZE = 5
+    GA_FITNESS_CACHE_SIZE = 4096  # Distinct schedules whose fitness is remembered per run
+    GA_MAX_POPULATION_SIZE = 500  # Caps for large personnel counts
+    GA_MAX_GENERATIONS = 300
+    GA_POPULATION_GROWTH = 1.2  # Exponent on the personnel complexity ratio
+    GA_GENERATION_GROWTH = 0.8
     
     # Personnel default counts
-    DEFAULT_PERSONNEL_COUNTS = {
+    DEFAULT_PERSONNEL_COUNTS = types.MappingProxyType({
         'R1': 5,
         'R2': 6,
         'R3': 4,
         'R4': 6
-    }
+    })
+    DEFAULT_PERSONNEL_TOTAL = sum(DEFAULT_PERSONNEL_COUNTS.values())
     
     # Personnel limits
     MIN_PERSONNEL_COUNT = 1
@@ -38,21 +46,24 @@ class Config:
     # Clinic rooms
     CLINIC_ROOMS = ['4201', '4202', '4203', '4204', '4205', '4207', '4208', '4209', '4213', '4218']
     HEALTH_CHECK_ROOMS = ['體檢1', '體檢2']
+    CLINIC_ROOMS_SET = frozenset(CLINIC_ROOMS)  # For membership checks; the lists keep display order
+    HEALTH_CHECK_ROOMS_SET = frozenset(HEALTH_CHECK_ROOMS)
     
     # Time slots
     TIME_SLOTS = ['Morning', 'Afternoon']
     WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
     TOTAL_WEEKS = 1
     
-    # Rotation units by level
-    ROTATION_UNITS = {
-        'R1': ['內科病房', '健康', '急診', '兒科病房', '精神1', '社區1', '婦產病房', '放射'],
-        'R2': ['婦產門診', '內科病房', '兒科門診', '外科病房', '社區2', '眼科門診', '皮膚門診', 
-               '神內門診', '復健門診', 'ENT門診', '精神2', '家庭醫業'],
-        'R3': ['CR', '斗六1', '神內門診', '泌尿門診', '糖尿病衛教', '安寧1', '老醫門診', 
-               '安寧2', '內科門診', '放射'],
-        'R4': ['睡眠門診', '旅遊門診', '骨鬆門診', '減重門診', '疼痛科', '斗六2', '其他']
-    }
+    # Rotation units by level (read-only; share instead of copying)
+    ROTATION_UNITS = types.MappingProxyType({
+        'R1': ('內科病房', '健康', '急診', '兒科病房', '精神1', '社區1', '婦產病房', '放射'),
+        'R2': ('婦產門診', '內科病房', '兒科門診', '外科病房', '社區2', '眼科門診', '皮膚門診', 
+               '神內門診', '復健門診', 'ENT門診', '精神2', '家庭醫業'),
+        'R3': ('CR', '斗六1', '神內門診', '泌尿門診', '糖尿病衛教', '安寧1', '老醫門診', 
+               '安寧2', '內科門診', '放射'),
+        'R4': ('睡眠門診', '旅遊門診', '骨鬆門診', '減重門診', '疼痛科', '斗六2', '其他')
+    })
+    ROTATION_UNITS_SET = types.MappingProxyType({level: frozenset(units) for level, units in ROTATION_UNITS.items()})
     
     # File paths
     TEMP_FOLDER = 'data/temp'
@@ -64,28 +75,73 @@ class Config:
     # Performance settings
     MAX_PROCESSING_TIME = 180  # seconds
     CLEANUP_INTERVAL = 3600  # Clean temp files every hour
+    SCHEDULER_MAX_WORKERS = 2  # Background GA runs per process
+    SCHEDULER_MAX_PENDING = 8  # GA runs allowed to wait for a worker before new ones are refused
+    SSE_HEARTBEAT_INTERVAL = 15  # seconds between progress-stream heartbeats
+    TASK_CACHE_SIZE = 500  # Scheduling tasks whose state is remembered
+    TASK_TTL = 3600  # seconds task state is kept after its last update
+    EXPORT_MAX_WORKERS = 3  # CSV exports built concurrently per finished run
+    EXPORT_CACHE_SIZE = 300  # In-memory CSV exports kept for download
+    EXPORT_CACHE_TTL = 3600  # seconds an export stays downloadable
+    INPUT_CACHE_SIZE = 256  # Validated payloads remembered for repeat submissions
+    INPUT_CACHE_TTL = 600  # seconds a validated payload is reused
+    VALIDATE_CACHE_SIZE = 2048  # Real-time validation bodies remembered
     
-    @staticmethod
-    def get_ga_config(personnel_count):
+    @classmethod
+    @functools.cache
+    def _base_ga_config(cls):
+        """GA parameters before size scaling, built once per config class"""
+        return types.MappingProxyType({
+            "population_size": cls.GA_DEFAULT_POPULATION_SIZE,
+            "max_generations": cls.GA_DEFAULT_GENERATIONS,
+            "elite_percentage": cls.GA_DEFAULT_ELITE_PERCENTAGE,
+            "mutation_rate": cls.GA_DEFAULT_MUTATION_RATE,
+            "crossover_rate": cls.GA_DEFAULT_CROSSOVER_RATE,
+            "tournament_size": cls.GA_DEFAULT_TOURNAMENT_SIZE,
+            "convergence_threshold": cls.GA_DEFAULT_CONVERGENCE_THRESHOLD,
+            "parallel_populations": cls.GA_DEFAULT_PARALLEL_POPULATIONS,
+            "migration_interval": cls.GA_DEFAULT_MIGRATION_INTERVAL,
+            "migration_size": cls.GA_DEFAULT_MIGRATION_SIZE,
+            "fitness_cache_size": cls.GA_FITNESS_CACHE_SIZE
+        })
+    
+    @classmethod
+    def get_ga_config(cls, personnel_count):
         """Get dynamic GA configuration based on problem size"""
-        base_config = {
-            "population_size": Config.GA_DEFAULT_POPULATION_SIZE,
-            "max_generations": Config.GA_DEFAULT_GENERATIONS,
-            "elite_percentage": Config.GA_DEFAULT_ELITE_PERCENTAGE,
-            "mutation_rate": Config.GA_DEFAULT_MUTATION_RATE,
-            "crossover_rate": Config.GA_DEFAULT_CROSSOVER_RATE,
-            "tournament_size": Config.GA_DEFAULT_TOURNAMENT_SIZE,
-            "convergence_threshold": Config.GA_DEFAULT_CONVERGENCE_THRESHOLD,
-            "parallel_populations": Config.GA_DEFAULT_PARALLEL_POPULATIONS,
-            "migration_interval": Config.GA_DEFAULT_MIGRATION_INTERVAL,
-            "migration_size": Config.GA_DEFAULT_MIGRATION_SIZE
-        }
+        base_config = dict(cls._base_ga_config())
         
         # Adjust for problem complexity (but keep it reasonable for 1 week)
-        default_total = sum(Config.DEFAULT_PERSONNEL_COUNTS.values())
+        default_total = cls.DEFAULT_PERSONNEL_TOTAL
         if personnel_count > default_total:
             complexity_ratio = personnel_count / default_total
-            base_config["population_size"] = min(500, int(Config.GA_DEFAULT_POPULATION_SIZE * complexity_ratio ** 1.2))
-            base_config["max_generations"] = min(800, int(Config.GA_DEFAULT_GENERATIONS * complexity_ratio ** 0.8))
+            base_config["population_size"] = min(cls.GA_MAX_POPULATION_SIZE, int(cls.GA_DEFAULT_POPULATION_SIZE * complexity_ratio ** cls.GA_POPULATION_GROWTH))
+            base_config["max_generations"] = min(cls.GA_MAX_GENERATIONS, int(cls.GA_DEFAULT_GENERATIONS * complexity_ratio ** cls.GA_GENERATION_GROWTH))
             
-        return base_config
\ No newline at end of file
+        return base_config
+
+
+class ProductionConfig(DevelopmentConfig):
+    """Production optimized configuration for Render deployment"""
+    
+    DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
+    
+    # Genetic Algorithm parameters - OPTIMIZED FOR RENDER FREE TIER
+    # Reduced to avoid timeout and memory issues
+    GA_DEFAULT_POPULATION_SIZE = 150  # Reduced from 300
+    GA_DEFAULT_GENERATIONS = 100      # Reduced from 200
+    GA_DEFAULT_ELITE_PERCENTAGE = 0.15  # Increased from 0.1 for faster convergence
+    GA_DEFAULT_CONVERGENCE_THRESHOLD = 20  # Reduced from 30
+    GA_DEFAULT_PARALLEL_POPULATIONS = 2    # Reduced from 3
+    # More conservative limits for production
+    GA_MAX_POPULATION_SIZE = 250
+    GA_MAX_GENERATIONS = 300
+    GA_POPULATION_GROWTH = 1.1
+    GA_GENERATION_GROWTH = 0.7
+    
+    # Performance settings - OPTIMIZED FOR RENDER
+    MAX_PROCESSING_TIME = 25  # Reduced from 180 to avoid 30s timeout
+    SCHEDULER_MAX_WORKERS = 1  # Single GA run at a time on free tier
+
+
+# Selected once at import; render.yaml sets FLASK_ENV=production
+Config = ProductionConfig if os.environ.get('FLASK_ENV') == 'production' else DevelopmentConfig
@@ -0,0 +1,7 @@
+"""Gunicorn settings; picked up automatically from the working directory"""
+
+
+def post_worker_init(worker):
+    """Start the GA helper processes once the worker has loaded the app"""
+    from app import prewarm_ga_workers
+    prewarm_ga_workers()
@@ -1,13 +1,151 @@
-import pandas as pd
-import json
+import orjson
 import csv
-from typing import Dict, List, Any
+import os
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Iterable, Iterator, TYPE_CHECKING
 from io import StringIO
+from operator import itemgetter
 from config.settings import Config
 
+# pandas is imported where DataFrames are built, keeping it off the app's startup path
+if TYPE_CHECKING:
+    import pandas as pd
+
+def freeze_rules(value: Any) -> Any:
+    """Read-only copy of parsed rules: dicts become mapping proxies and lists tuples, at every level"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze_rules(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_rules(item) for item in value)
+    return value
+
+def thaw_rules(value: Any) -> Any:
+    """Plain dict copy of frozen rules, e.g. for pickling; mapping proxies cannot be pickled"""
+    if isinstance(value, Mapping):
+        return {key: thaw_rules(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw_rules(item) for item in value]
+    return value
+
+# Parsed rules files by path, as (mtime_ns, read-only rules)
+_rules_cache = {}
+
+# Fallback rules used when no rules file exists; shared, so read-only throughout
+_DEFAULT_RULES = freeze_rules({
+    "unit_constraints": {
+        "健康": {
+            "min_clinics": 0,
+            "max_clinics": 2,
+            "health_check_required": True,
+            "description": "主要負責體檢，門診數量有限"
+        },
+        "急診": {
+            "min_clinics": 1,
+            "max_clinics": 3,
+            "preferred_time": "Morning",
+            "description": "急診輪訓，需保留時間處理急診業務"
+        },
+        "內科病房": {
+            "min_clinics": 2,
+            "max_clinics": 4,
+            "description": "一般門診負擔"
+        },
+        "兒科病房": {
+            "min_clinics": 2,
+            "max_clinics": 4,
+            "description": "一般門診負擔"
+        },
+        "精神1": {
+            "min_clinics": 1,
+            "max_clinics": 3,
+            "description": "精神科訓練"
+        },
+        "精神2": {
+            "min_clinics": 1,
+            "max_clinics": 3,
+            "description": "精神科訓練"
+        },
+        "社區1": {
+            "min_clinics": 2,
+            "max_clinics": 4,
+            "description": "社區醫學訓練"
+        },
+        "社區2": {
+            "min_clinics": 2,
+            "max_clinics": 4,
+            "description": "社區醫學訓練"
+        },
+        "婦產病房": {
+            "min_clinics": 2,
+            "max_clinics": 4,
+            "description": "一般門診負擔"
+        },
+        "婦產門診": {
+            "min_clinics": 2,
+            "max_clinics": 4,
+            "description": "婦產科門診"
+        },
+        "放射": {
+            "min_clinics": 0,
+            "max_clinics": 2,
+            "description": "放射科訓練，門診時間有限"
+        },
+        "CR": {
+            "min_clinics": 2,
+            "max_clinics": 4,
+            "description": "心臟復健"
+        },
+        "斗六1": {
+            "min_clinics": 1,
+            "max_clinics": 3,
+            "description": "斗六分院支援"
+        },
+        "斗六2": {
+            "min_clinics": 1,
+            "max_clinics": 3,
+            "description": "斗六分院支援"
+        },
+        "安寧1": {
+            "min_clinics": 1,
+            "max_clinics": 3,
+            "description": "安寧療護訓練"
+        },
+        "安寧2": {
+            "min_clinics": 1,
+            "max_clinics": 3,
+            "description": "安寧療護訓練"
+        },
+        "其他": {
+            "min_clinics": 2,
+            "max_clinics": 5,
+            "description": "彈性安排"
+        }
+    },
+    "general_rules": {
+        "max_clinics_per_day": 2,
+        "max_clinics_per_week": 8,
+        "min_rest_between_clinics": 0,
+        "health_check_priority": ["R1", "R2", "R3", "R4"],
+        "tuesday_teaching_exemption": True
+    },
+    "room_preferences": {
+        "內科門診": ["4201", "4202", "4203"],
+        "外科病房": ["4204", "4205"],
+        "兒科門診": ["4207", "4208"],
+        "婦產門診": ["4209", "4213"],
+        "其他": ["4218"]
+    }
+})
+
 class DataHandler:
     """Handle data parsing and CSV operations"""
     
+    # Room -> assignment category used by aggregate_statistics
+    room_kind = {
+        **dict.fromkeys(Config.HEALTH_CHECK_ROOMS_SET, 'health_check'),
+        **dict.fromkeys(Config.CLINIC_ROOMS_SET, 'clinic')
+    }
+    
     @staticmethod
     def parse_personnel_data(raw_data: Dict[str, Any]) -> Dict[str, Dict]:
         """Parse raw input data into structured personnel data"""
@@ -17,149 +155,58 @@ class DataHandler:
         raw_personnel = raw_data.get('personnel', {})
         
         for level, people in raw_personnel.items():
-            if level not in personnel_data:
-                personnel_data[level] = {}
-                
-            for person_id, person_info in people.items():
-                personnel_data[level][person_id] = {
+            personnel_data[level] = {
+                person_id: {
                     'name': person_info.get('name', ''),
                     'rotation_unit': person_info.get('rotation_unit', ''),
                     'health_check': person_info.get('health_check', False),
                     'tuesday_teaching': person_info.get('tuesday_teaching', False),
                     'fixed_schedule': person_info.get('fixed_schedule', None)
                 }
+                for person_id, person_info in people.items()
+            }
         
         return personnel_data
     
     @staticmethod
-    def load_rules_from_json(file_path: str) -> Dict[str, Any]:
-        """Load scheduling rules from JSON file"""
+    def load_rules_from_json(file_path: str) -> Mapping[str, Any]:
+        """Load scheduling rules from JSON file, re-parsing only after it changes"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            mtime = os.stat(file_path).st_mtime_ns
+            cached = _rules_cache.get(file_path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            
+            with open(file_path, 'rb') as f:
+                rules = freeze_rules(orjson.loads(f.read()))
+            _rules_cache[file_path] = (mtime, rules)
+            return rules
         except FileNotFoundError:
             # Return default rules if file not found
             return DataHandler.get_default_rules()
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in rules file: {str(e)}")
     
     @staticmethod
-    def get_default_rules() -> Dict[str, Any]:
+    def get_default_rules() -> Mapping[str, Any]:
         """Get default scheduling rules"""
-        return {
-            "unit_constraints": {
-                "健康": {
-                    "min_clinics": 0,
-                    "max_clinics": 2,
-                    "health_check_required": True,
-                    "description": "主要負責體檢，門診數量有限"
-                },
-                "急診": {
-                    "min_clinics": 1,
-                    "max_clinics": 3,
-                    "preferred_time": "Morning",
-                    "description": "急診輪訓，需保留時間處理急診業務"
-                },
-                "內科病房": {
-                    "min_clinics": 2,
-                    "max_clinics": 4,
-                    "description": "一般門診負擔"
-                },
-                "兒科病房": {
-                    "min_clinics": 2,
-                    "max_clinics": 4,
-                    "description": "一般門診負擔"
-                },
-                "精神1": {
-                    "min_clinics": 1,
-                    "max_clinics": 3,
-                    "description": "精神科訓練"
-                },
-                "精神2": {
-                    "min_clinics": 1,
-                    "max_clinics": 3,
-                    "description": "精神科訓練"
-                },
-                "社區1": {
-                    "min_clinics": 2,
-                    "max_clinics": 4,
-                    "description": "社區醫學訓練"
-                },
-                "社區2": {
-                    "min_clinics": 2,
-                    "max_clinics": 4,
-                    "description": "社區醫學訓練"
-                },
-                "婦產病房": {
-                    "min_clinics": 2,
-                    "max_clinics": 4,
-                    "description": "一般門診負擔"
-                },
-                "婦產門診": {
-                    "min_clinics": 2,
-                    "max_clinics": 4,
-                    "description": "婦產科門診"
-                },
-                "放射": {
-                    "min_clinics": 0,
-                    "max_clinics": 2,
-                    "description": "放射科訓練，門診時間有限"
-                },
-                "CR": {
-                    "min_clinics": 2,
-                    "max_clinics": 4,
-                    "description": "心臟復健"
-                },
-                "斗六1": {
-                    "min_clinics": 1,
-                    "max_clinics": 3,
-                    "description": "斗六分院支援"
-                },
-                "斗六2": {
-                    "min_clinics": 1,
-                    "max_clinics": 3,
-                    "description": "斗六分院支援"
-                },
-                "安寧1": {
-                    "min_clinics": 1,
-                    "max_clinics": 3,
-                    "description": "安寧療護訓練"
-                },
-                "安寧2": {
-                    "min_clinics": 1,
-                    "max_clinics": 3,
-                    "description": "安寧療護訓練"
-                },
-                "其他": {
-                    "min_clinics": 2,
-                    "max_clinics": 5,
-                    "description": "彈性安排"
-                }
-            },
-            "general_rules": {
-                "max_clinics_per_day": 2,
-                "max_clinics_per_week": 8,
-                "min_rest_between_clinics": 0,
-                "health_check_priority": ["R1", "R2", "R3", "R4"],
-                "tuesday_teaching_exemption": True
-            },
-            "room_preferences": {
-                "內科門診": ["4201", "4202", "4203"],
-                "外科病房": ["4204", "4205"],
-                "兒科門診": ["4207", "4208"],
-                "婦產門診": ["4209", "4213"],
-                "其他": ["4218"]
-            }
-        }
+        return _DEFAULT_RULES
     
     @staticmethod
     def validate_csv_format(csv_content: str) -> Dict[str, Any]:
         """Validate CSV file format"""
+        import pandas as pd
+        
         try:
-            df = pd.read_csv(StringIO(csv_content))
+            # Parse only the columns we validate; a callable usecols tolerates missing ones
+            required_columns = ['Person', 'Level', 'Rotation_Unit']
+            df = pd.read_csv(
+                StringIO(csv_content),
+                usecols=lambda col: col in required_columns,
+                dtype={'Level': 'category', 'Rotation_Unit': 'category'}
+            )
             
             # Check required columns
-            required_columns = ['Person', 'Level', 'Rotation_Unit']
             missing_columns = [col for col in required_columns if col not in df.columns]
             
             if missing_columns:
@@ -173,17 +220,24 @@ class DataHandler:
             
             # Check levels
             valid_levels = ['R1', 'R2', 'R3', 'R4']
-            invalid_levels = df[~df['Level'].isin(valid_levels)]['Level'].unique()
+            invalid_levels = df['Level'].cat.categories.difference(valid_levels)
             if len(invalid_levels) > 0:
                 errors.append(f"Invalid levels found: {', '.join(invalid_levels)}")
             
+            # Blank levels are NaN, which the categories above leave out
+            for idx in df.index[df['Level'].isna()]:
+                errors.append(f"Row {idx+1}: Missing level")
+            
             # Check rotation units
-            for idx, row in df.iterrows():
-                level = row['Level']
-                unit = row['Rotation_Unit']
-                if level in Config.ROTATION_UNITS:
-                    if unit not in Config.ROTATION_UNITS[level]:
-                        errors.append(f"Row {idx+1}: Invalid rotation unit '{unit}' for {level}")
+            pairs = list(zip(df['Level'].values, df['Rotation_Unit'].values))
+            units_by_level = Config.ROTATION_UNITS_SET
+            invalid = [
+                pos for pos, (level, unit) in enumerate(pairs)
+                if level in units_by_level and unit not in units_by_level[level]
+            ]
+            for pos in invalid:
+                level, unit = pairs[pos]
+                errors.append(f"Row {df.index[pos]+1}: Invalid rotation unit '{unit}' for {level}")
             
             return {
                 'valid': len(errors) == 0,
@@ -199,17 +253,33 @@ class DataHandler:
             }
     
     @staticmethod
-    def export_to_csv(data: List[Dict[str, Any]], columns: List[str]) -> str:
+    def export_to_csv(data: Iterable[Dict[str, Any]], columns: List[str]) -> str:
         """Export data to CSV format"""
-        output = StringIO()
-        writer = csv.DictWriter(output, fieldnames=columns)
-        writer.writeheader()
-        writer.writerows(data)
-        return output.getvalue()
+        return ''.join(DataHandler.iter_csv(data, columns))
+    
+    @staticmethod
+    def iter_csv(data: Iterable[Dict[str, Any]], columns: List[str], batch_size: int = 500) -> Iterator[str]:
+        """Yield CSV text in batches of rows, for streaming with flask.Response"""
+        buffer = StringIO()
+        writer = csv.writer(buffer, lineterminator='\r\n')
+        writer.writerow(columns)
+        
+        # Every row must carry all columns; keys outside columns are ignored
+        getter = itemgetter(*columns) if len(columns) > 1 else (lambda row: (row[columns[0]],))
+        for count, row in enumerate(data, 1):
+            writer.writerow(getter(row))
+            if count % batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        
+        yield buffer.getvalue()
     
     @staticmethod
-    def parse_schedule_for_display(schedule: Dict[str, Any]) -> pd.DataFrame:
+    def parse_schedule_for_display(schedule: Dict[str, Any]) -> 'pd.DataFrame':
         """Parse schedule data for display in UI"""
+        import pandas as pd
+        
         rows = []
         
         for week, week_data in schedule.items():
@@ -236,11 +306,6 @@ class DataHandler:
             'clinic_coverage': 0
         }
         
-        total_clinic_slots = 0
-        filled_clinic_slots = 0
-        total_health_slots = 0
-        filled_health_slots = 0
-        
         # Initialize counters
         for level, people in personnel_data.items():
             for person_id in people:
@@ -250,40 +315,37 @@ class DataHandler:
                     'total': 0
                 }
         
+        by_person = stats['assignments_by_person']
+        by_room = stats['assignments_by_room']
+        total_by_kind = {'clinic': 0, 'health_check': 0, None: 0}
+        filled_by_kind = dict(total_by_kind)
+        room_kind = DataHandler.room_kind
+        
         # Count assignments
         for week, week_data in schedule.items():
             for day, day_data in week_data.items():
-                if day not in stats['coverage_by_day']:
-                    stats['coverage_by_day'][day] = {'total': 0, 'filled': 0}
+                day_coverage = stats['coverage_by_day'].setdefault(day, {'total': 0, 'filled': 0})
                     
                 for time_slot, assignments in day_data.items():
+                    day_coverage['total'] += len(assignments)
                     for room, person in assignments.items():
-                        if room in Config.CLINIC_ROOMS:
-                            total_clinic_slots += 1
-                            if person:
-                                filled_clinic_slots += 1
-                                stats['assignments_by_person'][person]['clinic'] += 1
-                                stats['assignments_by_person'][person]['total'] += 1
-                        elif room in Config.HEALTH_CHECK_ROOMS:
-                            total_health_slots += 1
-                            if person:
-                                filled_health_slots += 1
-                                stats['assignments_by_person'][person]['health_check'] += 1
-                                stats['assignments_by_person'][person]['total'] += 1
-                        
-                        if room not in stats['assignments_by_room']:
-                            stats['assignments_by_room'][room] = 0
-                        if person:
-                            stats['assignments_by_room'][room] += 1
-                            
-                        stats['coverage_by_day'][day]['total'] += 1
+                        kind = room_kind.get(room)
+                        total_by_kind[kind] += 1
                         if person:
-                            stats['coverage_by_day'][day]['filled'] += 1
+                            filled_by_kind[kind] += 1
+                            by_room[room] = by_room.get(room, 0) + 1
+                            day_coverage['filled'] += 1
+                            if kind:
+                                counts = by_person[person]
+                                counts[kind] += 1
+                                counts['total'] += 1
+                        elif room not in by_room:
+                            by_room[room] = 0
         
         # Calculate coverage rates
-        if total_clinic_slots > 0:
-            stats['clinic_coverage'] = (filled_clinic_slots / total_clinic_slots) * 100
-        if total_health_slots > 0:
-            stats['health_check_coverage'] = (filled_health_slots / total_health_slots) * 100
+        if total_by_kind['clinic'] > 0:
+            stats['clinic_coverage'] = (filled_by_kind['clinic'] / total_by_kind['clinic']) * 100
+        if total_by_kind['health_check'] > 0:
+            stats['health_check_coverage'] = (filled_by_kind['health_check'] / total_by_kind['health_check']) * 100
             
         return stats
\ No newline at end of file
@@ -1,28 +1,69 @@
-import pandas as pd
+import csv
 import zipfile  # Using Python's built-in zipfile module
+from collections import Counter
+from functools import cached_property
+from operator import itemgetter
 from datetime import datetime
-from typing import Dict, Any, List
-import os
+from typing import Dict, Any, List, Iterable, Iterator
 from io import StringIO
 from config.settings import Config
 
+# Chinese column labels for Config.TIME_SLOTS, in column order
+_ZH_TO_EN_TIME = {'上午': 'Morning', '下午': 'Afternoon'}
+
+# Friendly file names inside the ZIP bundle, by export type
+_ARCNAMES = {
+    'basic': '原始排班表.csv',
+    'personal': '個人排班表.csv',
+    'statistics': '統計報表.csv'
+}
+
+class _ChunkSink:
+    """Write-only stream collecting bytes until drained; ZipFile treats it as unseekable"""
+    
+    def __init__(self):
+        self.chunks = []
+    
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
 class ExportHandler:
     """Handle multiple CSV export formats"""
     
+    # Loop invariants shared by every export
+    ROOMS = tuple(Config.CLINIC_ROOMS) + tuple(Config.HEALTH_CHECK_ROOMS)
+    WEEK_KEYS = tuple(f"W{week_num}" for week_num in range(1, Config.TOTAL_WEEKS + 1))
+    
     def __init__(self, schedule_data: Dict[str, Any], personnel_data: Dict[str, Dict]):
         self.schedule = schedule_data
         self.personnel = personnel_data
         
     def generate_basic_csv(self) -> str:
         """Generate traditional week-based schedule view (原始排班表)"""
-        rows = []
-        
-        # Create header
-        header = ['Week', 'Day', 'Time'] + Config.CLINIC_ROOMS + Config.HEALTH_CHECK_ROOMS
+        header = ['Week', 'Day', 'Time', *self.ROOMS]
+        return self._to_csv(header, self._iter_basic_rows())
+    
+    def _iter_basic_rows(self) -> Iterator[List[str]]:
+        """Yield one basic-view row per scheduled week/day/time slot"""
+        # Cell text per person, resolved once instead of per slot
+        labels = {}
+        for people in self.personnel.values():
+            for person_id, person_data in people.items():
+                person_name = person_data.get('name', '')
+                labels.setdefault(person_id, f"{person_id}\n{person_name}" if person_name else person_id)
         
         # Process schedule data
-        for week_num in range(1, Config.TOTAL_WEEKS + 1):
-            week_key = f"W{week_num}"
+        rooms = self.ROOMS
+        for week_key in self.WEEK_KEYS:
             if week_key not in self.schedule:
                 continue
                 
@@ -38,240 +79,207 @@ class ExportHandler:
                     if time_slot not in day_data:
                         continue
                         
-                    row = {
-                        'Week': week_key,
-                        'Day': day,
-                        'Time': time_slot
-                    }
-                    
                     # Add room assignments
                     assignments = day_data[time_slot]
-                    for room in Config.CLINIC_ROOMS + Config.HEALTH_CHECK_ROOMS:
+                    row = [week_key, day, time_slot]
+                    for room in rooms:
                         assigned_person = assignments.get(room, '')
-                        if assigned_person:
-                            # Try to get person's name
-                            person_name = self._get_person_name(assigned_person)
-                            if person_name:
-                                row[room] = f"{assigned_person}\n{person_name}"
-                            else:
-                                row[room] = assigned_person
-                        else:
-                            row[room] = ''
+                        row.append(labels.get(assigned_person, assigned_person) if assigned_person else '')
                     
-                    rows.append(row)
-        
-        # Convert to CSV
-        df = pd.DataFrame(rows, columns=header)
-        return df.to_csv(index=False, encoding='utf-8-sig')
+                    yield row
     
     def generate_personal_csv(self) -> str:
         """Generate person-centric schedule view (個人排班表)"""
-        rows = []
+        # Create column order
+        columns = ['人員', '級別', '輪訓單位']
+        for week_key in self.WEEK_KEYS:
+            columns.extend(f"{week_key}{time_slot}" for time_slot in _ZH_TO_EN_TIME)
+        columns.extend(['門診總數', '體檢總數'])
+        
+        return self._to_csv(columns, self._iter_personal_rows())
+    
+    def _iter_personal_rows(self) -> Iterator[List[Any]]:
+        """Yield one personal-view row per person, in column order"""
+        # Room of the first assignment per (week, slot, person), built in one pass
+        assignment_index = self._build_assignment_index()
         
         # Process each person
         for level, people in self.personnel.items():
             for person_id, person_data in people.items():
                 person_name = person_data.get('name', '')
-                row = {
-                    '人員': f"{person_id} ({person_name})" if person_name else person_id,
-                    '級別': level,
-                    '輪訓單位': person_data['rotation_unit']
-                }
+                row = [
+                    f"{person_id} ({person_name})" if person_name else person_id,
+                    level,
+                    person_data['rotation_unit']
+                ]
                 
                 # Initialize counts
                 clinic_count = 0
                 health_check_count = 0
                 
                 # Add weekly assignments
-                for week_num in range(1, Config.TOTAL_WEEKS + 1):
-                    week_key = f"W{week_num}"
-                    
-                    for time_slot in ['上午', '下午']:
-                        slot_key = f"{week_key}{time_slot}"
-                        assignment = self._find_person_assignment(
-                            person_id, week_num, time_slot
-                        )
+                for week_key in self.WEEK_KEYS:
+                    for time_slot in _ZH_TO_EN_TIME:
+                        room = assignment_index.get((week_key, time_slot, person_id))
                         
-                        if assignment:
-                            row[slot_key] = assignment['room']
-                            if assignment['room'] in Config.HEALTH_CHECK_ROOMS:
+                        if room:
+                            row.append(room)
+                            if room in Config.HEALTH_CHECK_ROOMS_SET:
                                 health_check_count += 1
                             else:
                                 clinic_count += 1
                         else:
-                            row[slot_key] = '-'
+                            row.append('-')
                 
                 # Add statistics
-                row['門診總數'] = clinic_count
-                row['體檢總數'] = health_check_count
+                row.append(clinic_count)
+                row.append(health_check_count)
                 
-                rows.append(row)
-        
-        # Create column order
-        columns = ['人員', '級別', '輪訓單位']
-        for week_num in range(1, Config.TOTAL_WEEKS + 1):
-            columns.extend([f"W{week_num}上午", f"W{week_num}下午"])
-        columns.extend(['門診總數', '體檢總數'])
-        
-        # Convert to CSV
-        df = pd.DataFrame(rows, columns=columns)
-        return df.to_csv(index=False, encoding='utf-8-sig')
+                yield row
     
-    def _get_person_name(self, person_id: str) -> str:
-        """Get person's name from personnel data"""
-        for level, people in self.personnel.items():
-            if person_id in people:
-                return people[person_id].get('name', '')
-        return ''
+    @staticmethod
+    def _to_csv(header: List[str], rows: Iterable[List[Any]]) -> str:
+        """Write header and row lists as CSV text"""
+        buffer = StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(header)
+        writer.writerows(rows)
+        return buffer.getvalue()
     
     def generate_statistics_csv(self) -> str:
         """Generate statistics and summary report (統計報表)"""
+        # (統計項目, 數值) pairs in output order
         rows = []
         
         # Basic statistics
         total_personnel = sum(len(people) for people in self.personnel.values())
-        rows.append({'統計項目': '總人員數', '數值': total_personnel})
+        rows.append(('總人員數', total_personnel))
         
         # Personnel by level
         for level in ['R1', 'R2', 'R3', 'R4']:
             count = len(self.personnel.get(level, {}))
-            rows.append({'統計項目': f"{level}人員數", '數值': count})
+            rows.append((f"{level}人員數", count))
         
         # Calculate slot statistics
         total_clinic_slots = Config.TOTAL_WEEKS * len(Config.WEEKDAYS) * len(Config.TIME_SLOTS) * len(Config.CLINIC_ROOMS)
         total_health_slots = Config.TOTAL_WEEKS * len(Config.WEEKDAYS) * len(Config.TIME_SLOTS) * len(Config.HEALTH_CHECK_ROOMS)
         
-        rows.append({'統計項目': '總門診時段', '數值': total_clinic_slots})
-        rows.append({'統計項目': '總體檢時段', '數值': total_health_slots})
+        rows.append(('總門診時段', total_clinic_slots))
+        rows.append(('總體檢時段', total_health_slots))
         
         # Count filled slots
-        filled_clinic_slots = 0
-        filled_health_slots = 0
-        person_assignments = {}
+        totals = self._schedule_totals
+        filled_clinic_slots = totals['filled_clinic']
+        filled_health_slots = totals['filled_health']
+        person_assignments = totals['person_counts']
         
-        for week_key, week_data in self.schedule.items():
-            for day, day_data in week_data.items():
-                for time_slot, assignments in day_data.items():
-                    for room, person in assignments.items():
-                        if person:
-                            if room in Config.CLINIC_ROOMS:
-                                filled_clinic_slots += 1
-                            elif room in Config.HEALTH_CHECK_ROOMS:
-                                filled_health_slots += 1
-                            
-                            if person not in person_assignments:
-                                person_assignments[person] = 0
-                            person_assignments[person] += 1
-        
-        rows.append({'統計項目': '已分配門診時段', '數值': filled_clinic_slots})
-        rows.append({'統計項目': '已分配體檢時段', '數值': filled_health_slots})
+        rows.append(('已分配門診時段', filled_clinic_slots))
+        rows.append(('已分配體檢時段', filled_health_slots))
         
         # Coverage rates
         clinic_coverage = (filled_clinic_slots / total_clinic_slots * 100) if total_clinic_slots > 0 else 0
         health_coverage = (filled_health_slots / total_health_slots * 100) if total_health_slots > 0 else 0
         
-        rows.append({'統計項目': '門診覆蓋率', '數值': f"{clinic_coverage:.1f}%"})
-        rows.append({'統計項目': '體檢覆蓋率', '數值': f"{health_coverage:.1f}%"})
+        rows.append(('門診覆蓋率', f"{clinic_coverage:.1f}%"))
+        rows.append(('體檢覆蓋率', f"{health_coverage:.1f}%"))
         
         # Average assignments
         if person_assignments:
             avg_assignments = sum(person_assignments.values()) / len(person_assignments)
-            rows.append({'統計項目': '平均每人門診數', '數值': f"{avg_assignments:.1f}"})
+            rows.append(('平均每人門診數', f"{avg_assignments:.1f}"))
             
-            # Find min/max
-            max_person = max(person_assignments.items(), key=lambda x: x[1])
-            min_person = min(person_assignments.items(), key=lambda x: x[1])
+            # Find min/max; ties go to whoever was assigned first
+            max_person = person_assignments.most_common(1)[0]
+            min_person = min(person_assignments.items(), key=itemgetter(1))
             
-            rows.append({'統計項目': '最多門診人員', '數值': f"{max_person[0]} ({max_person[1]})"})
-            rows.append({'統計項目': '最少門診人員', '數值': f"{min_person[0]} ({min_person[1]})"})
+            rows.append(('最多門診人員', f"{max_person[0]} ({max_person[1]})"))
+            rows.append(('最少門診人員', f"{min_person[0]} ({min_person[1]})"))
         
         # Rotation unit distribution
-        unit_counts = {}
-        for level, people in self.personnel.items():
-            for person_id, person_data in people.items():
-                unit = person_data['rotation_unit']
-                if unit not in unit_counts:
-                    unit_counts[unit] = 0
-                unit_counts[unit] += 1
+        unit_counts = Counter(
+            person_data['rotation_unit']
+            for people in self.personnel.values()
+            for person_data in people.values()
+        )
         
-        rows.append({'統計項目': '', '數值': ''})  # Empty row
-        rows.append({'統計項目': '輪訓單位分布', '數值': ''})
+        rows.append(('', ''))  # Empty row
+        rows.append(('輪訓單位分布', ''))
         
-        for unit, count in sorted(unit_counts.items(), key=lambda x: x[1], reverse=True):
-            rows.append({'統計項目': f"  {unit}", '數值': count})
+        for unit, count in sorted(unit_counts.items(), key=itemgetter(1), reverse=True):
+            rows.append((f"  {unit}", count))
         
-        # Convert to CSV
-        df = pd.DataFrame(rows)
-        return df.to_csv(index=False, encoding='utf-8-sig')
+        return self._to_csv(['統計項目', '數值'], rows)
     
-    def _find_person_assignment(self, person_id: str, week_num: int, 
-                               time_slot: str) -> Dict[str, str]:
-        """Find where a person is assigned in a specific time slot"""
-        week_key = f"W{week_num}"
-        
-        # Convert Chinese time slot to English
-        english_time = 'Morning' if time_slot == '上午' else 'Afternoon'
+    @cached_property
+    def _schedule_totals(self) -> Dict[str, Any]:
+        """Slot and per-person counts shared by the statistics and summary reports, in one pass"""
+        filled_clinic = 0
+        filled_health = 0
+        total_slots = 0
+        person_counts = Counter()
         
-        if week_key not in self.schedule:
-            return None
-            
-        week_data = self.schedule[week_key]
+        for week_data in self.schedule.values():
+            for day_data in week_data.values():
+                for assignments in day_data.values():
+                    total_slots += len(assignments)
+                    for room, person in assignments.items():
+                        if person:
+                            if room in Config.CLINIC_ROOMS_SET:
+                                filled_clinic += 1
+                            elif room in Config.HEALTH_CHECK_ROOMS_SET:
+                                filled_health += 1
+                            person_counts[person] += 1
+        
+        return {
+            'filled_clinic': filled_clinic,
+            'filled_health': filled_health,
+            'total_slots': total_slots,
+            'filled_slots': sum(person_counts.values()),
+            'person_counts': person_counts
+        }
+    
+    def _build_assignment_index(self) -> Dict[tuple, str]:
+        """Map (week_key, Chinese time slot, person_id) to the room of the first matching assignment"""
+        index = {}
         
-        for day in Config.WEEKDAYS:
-            if day not in week_data:
-                continue
-                
-            if english_time not in week_data[day]:
+        for week_key in self.WEEK_KEYS:
+            week_data = self.schedule.get(week_key)
+            if week_data is None:
                 continue
-                
-            assignments = week_data[day][english_time]
             
-            for room, assigned_person in assignments.items():
-                if assigned_person == person_id:
-                    return {
-                        'day': day,
-                        'room': room,
-                        'time': english_time
-                    }
-        
-        return None
-    
-    def create_zip_bundle(self, files: Dict[str, str], timestamp: str) -> str:
-        """Create ZIP file with all formats"""
-        zip_filename = f"data/temp/clinic_schedule_{timestamp}.zip"
-        
-        with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for file_type, file_path in files.items():
-                if os.path.exists(file_path):
-                    # Add file to zip with a friendly name
-                    if file_type == 'basic':
-                        arcname = '原始排班表.csv'
-                    elif file_type == 'personal':
-                        arcname = '個人排班表.csv'
-                    elif file_type == 'statistics':
-                        arcname = '統計報表.csv'
-                    else:
-                        arcname = os.path.basename(file_path)
+            for time_slot, english_time in _ZH_TO_EN_TIME.items():
+                for day in Config.WEEKDAYS:
+                    if day not in week_data or english_time not in week_data[day]:
+                        continue
                     
-                    zipf.write(file_path, arcname)
+                    for room, assigned_person in week_data[day][english_time].items():
+                        index.setdefault((week_key, time_slot, assigned_person), room)
         
-        return zip_filename
+        return index
+    
+    def stream_zip_bundle(self, files: Dict[str, bytes]) -> Iterator[bytes]:
+        """Yield a ZIP archive of all formats chunk by chunk as each file is compressed"""
+        sink = _ChunkSink()
+        
+        # Level 1 compresses CSV nearly as well as the default, much faster
+        with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
+            for file_type, data in files.items():
+                # Add file to zip with a friendly name
+                arcname = _ARCNAMES.get(file_type, f"{file_type}.csv")
+                zipf.writestr(arcname, data)
+                yield sink.drain()
+        
+        # Central directory is written on close
+        yield sink.drain()
     
     def generate_summary_report(self) -> str:
         """Generate a summary report for display"""
         summary = []
         
         # Total coverage
-        total_slots = 0
-        filled_slots = 0
-        
-        for week_key, week_data in self.schedule.items():
-            for day, day_data in week_data.items():
-                for time_slot, assignments in day_data.items():
-                    for room, person in assignments.items():
-                        total_slots += 1
-                        if person:
-                            filled_slots += 1
+        totals = self._schedule_totals
+        total_slots = totals['total_slots']
+        filled_slots = totals['filled_slots']
         
         coverage = (filled_slots / total_slots * 100) if total_slots > 0 else 0
         
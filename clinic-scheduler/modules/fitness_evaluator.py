@@ -1,23 +1,107 @@
 """Fitness evaluation for genetic algorithm based on strict rules"""
-import numpy as np
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, NamedTuple, Optional, Set
+from config.settings import Config
 from modules.schedule_requirements import (
     DAILY_ROOM_REQUIREMENTS, R1_RULES, R2_RULES, R3_RULES, R4_RULES
 )
 
+# Membership sets for the per-assignment checks
+_HEALTH_ROOMS = Config.HEALTH_CHECK_ROOMS_SET
+_ROOM_4201_LEVELS = frozenset(['R2', 'R3'])
+
+class _ScheduleIndex(NamedTuple):
+    """Views of one schedule that the checkers share, built in a single traversal"""
+    assignments_by_person: Dict[str, List[Tuple]]  # person -> [(day, time_slot, room)]
+    double_bookings: Dict[Tuple[str, str], List[str]]  # (day, time_slot) -> repeated persons, in room order
+    morning_sets: Dict[str, Set[str]]  # day -> persons working the morning
+    afternoon_sets: Dict[str, Set[str]]  # day -> persons working the afternoon
+    person_counts: Dict[str, int]  # person -> assignment count
+
+class _CompiledRules(NamedTuple):
+    """Level rules resolved for one (level, rotation unit) pair"""
+    fixed_assignments: Optional[Tuple]  # (day, time_slot, required room set or True) per rule
+    restrictions: Any  # restricted days/slots, or a {'required': ...} health check slot
+    max_clinics: float  # non-health clinic cap after special cases
+    require_4201: bool
+    require_morning: bool
+    require_different_times: bool
+
 class FitnessEvaluator:
     def __init__(self, personnel_list: List[Dict], days: List[str], time_slots: List[str]):
         self.personnel_list = personnel_list
         self.days = days
         self.time_slots = time_slots
+        
+        # Lookups built once; every checker resolves people by ID
+        self._person_index = {p['id']: p for p in personnel_list}
+        self._r4_fixed_persons = [
+            (p['id'], p['fixed_schedule']['day'], p['fixed_schedule']['time_slot'])
+            for p in personnel_list if p['level'] == 'R4' and p.get('fixed_schedule')
+        ]
+        self._r4_tuesday_teaching = frozenset(
+            p['id'] for p in personnel_list if p['level'] == 'R4' and p.get('tuesday_teaching', False)
+        )
+        self._health_check_required = frozenset(p['id'] for p in personnel_list if p.get('health_check', False))
+        self._full_day_exempt = frozenset(
+            p['id'] for p in personnel_list if p['level'] == 'R1' and p['rotation_unit'] == '健康'
+        )
+        
+        # (day, time_slot, required rooms, required health check rooms) per slot with requirements;
+        # the requirements never change between evaluations
+        self._required_slots = []
+        for day in days:
+            for time_slot in time_slots:
+                required_rooms = DAILY_ROOM_REQUIREMENTS.get(day, {}).get(time_slot)
+                if required_rooms is None:
+                    continue
+                health_rooms = tuple(room for room in ['體檢1', '體檢2'] if room in required_rooms)
+                self._required_slots.append((day, time_slot, tuple(required_rooms), health_rooms))
+        self._required_count = sum(len(rooms) for _, _, rooms, _ in self._required_slots)
+        
         self.level_rules = {
             'R1': R1_RULES,
             'R2': R2_RULES,
             'R3': R3_RULES,
             'R4': R4_RULES
         }
+        
+        # Rule flags per (level, rotation unit) present in the personnel list
+        self._compiled_rules = {}
+        for person in personnel_list:
+            key = (person['level'], person['rotation_unit'])
+            if key not in self._compiled_rules and person['level'] in self.level_rules:
+                self._compiled_rules[key] = self._compile_rules(*key)
     
-    def evaluate(self, schedule: Dict) -> Tuple[float, Dict[str, Any]]:
+    def _compile_rules(self, level: str, rotation_unit: str) -> _CompiledRules:
+        """Resolve the level rules that apply to one rotation unit"""
+        rules = self.level_rules[level]
+        max_clinics = rules.get('max_non_health_clinics', float('inf'))
+        
+        # Check special cases
+        if 'special_cases' in rules and rotation_unit in rules['special_cases']:
+            max_clinics = rules['special_cases'][rotation_unit]
+        
+        # Flatten day -> time_slot -> rooms into one tuple; empty room lists never apply
+        fixed_rules = rules.get('fixed_assignments', {}).get(rotation_unit)
+        fixed_assignments = None
+        if fixed_rules is not None:
+            fixed_assignments = tuple(
+                (day, time_slot, True if required_rooms is True else frozenset(required_rooms))
+                for day, time_rules in fixed_rules.items()
+                for time_slot, required_rooms in time_rules.items()
+                if required_rooms is True or (isinstance(required_rooms, list) and required_rooms)
+            )
+        
+        return _CompiledRules(
+            fixed_assignments=fixed_assignments,
+            restrictions=rules.get('restrictions', {}).get(rotation_unit),
+            max_clinics=max_clinics,
+            require_4201=level in ['R2', 'R3'] and rules.get('require_4201', False),
+            require_morning=level in ['R3', 'R4'] and rules.get('require_morning', False),
+            require_different_times=level == 'R2' and rules.get('require_different_times', False)
+        )
+    
+    def evaluate(self, schedule: Dict, collect_messages: bool = True) -> Tuple[float, Dict[str, Any]]:
         """Evaluate a schedule and return fitness score and violation details"""
         violations = {
             'hard_violations': [],
@@ -25,103 +109,131 @@ class FitnessEvaluator:
             'total_penalty': 0
         }
         
+        # Walk the schedule once; the checkers below read these views
+        index = self._build_indices(schedule)
+        
         # Check all hard constraints
-        self._check_no_double_booking(schedule, violations)
-        self._check_all_required_rooms_filled(schedule, violations)  # New check
-        self._check_health_check_coverage(schedule, violations)
-        self._check_no_full_day_assignment(schedule, violations)
-        self._check_4201_restriction(schedule, violations)  # New check for 4201
-        self._check_level_specific_rules(schedule, violations)
-        self._check_r4_fixed_schedules(schedule, violations)  # New check for R4 fixed times
+        self._check_no_double_booking(index, violations, collect_messages)
+        self._check_all_required_rooms_filled(schedule, violations, collect_messages)  # New check
+        self._check_health_check_coverage(schedule, violations, collect_messages)
+        self._check_no_full_day_assignment(index, violations, collect_messages)
+        self._check_4201_restriction(schedule, violations, collect_messages)  # New check for 4201
+        self._check_level_specific_rules(index, violations, collect_messages)
+        self._check_r4_fixed_schedules(index, violations, collect_messages)  # New check for R4 fixed times
         
         # Calculate positive scores
         coverage_score = self._calculate_coverage_score(schedule)
-        distribution_score = self._calculate_distribution_score(schedule)
+        distribution_score = self._calculate_distribution_score(index)
         
         # Final fitness score
         fitness = coverage_score + distribution_score - violations['total_penalty']
         
         return fitness, violations
     
-    def _check_no_double_booking(self, schedule: Dict, violations: Dict):
+    def evaluate_fast(self, schedule: Dict) -> float:
+        """Fitness score only; skips formatting violation messages nobody reads during selection"""
+        fitness, _ = self.evaluate(schedule, collect_messages=False)
+        return fitness
+    
+    def _build_indices(self, schedule: Dict) -> _ScheduleIndex:
+        """Collect per-person assignments, per-slot repeats and per-day worker sets in one pass"""
+        assignments_by_person = {}
+        double_bookings = {}
+        morning_sets = {}
+        afternoon_sets = {}
+        
+        for day, day_data in schedule.items():
+            for time_slot, assignments in day_data.items():
+                slot_persons = set()
+                
+                for room, person_id in assignments.items():
+                    if not person_id:
+                        continue
+                    
+                    if person_id in slot_persons:
+                        double_bookings.setdefault((day, time_slot), []).append(person_id)
+                    else:
+                        slot_persons.add(person_id)
+                    
+                    if person_id in assignments_by_person:
+                        assignments_by_person[person_id].append((day, time_slot, room))
+                    else:
+                        assignments_by_person[person_id] = [(day, time_slot, room)]
+                
+                if time_slot == 'Morning':
+                    morning_sets[day] = slot_persons
+                elif time_slot == 'Afternoon':
+                    afternoon_sets[day] = slot_persons
+        
+        person_counts = {person_id: len(assignments) for person_id, assignments in assignments_by_person.items()}
+        
+        return _ScheduleIndex(assignments_by_person, double_bookings, morning_sets, afternoon_sets, person_counts)
+    
+    def _check_no_double_booking(self, index: _ScheduleIndex, violations: Dict, collect_messages: bool):
         """Rule 1: Same person cannot be in multiple rooms at same time"""
+        if not index.double_bookings:
+            return
+        
         for day in self.days:
             for time_slot in self.time_slots:
-                assigned_persons = []
-                
-                if day in schedule and time_slot in schedule[day]:
-                    for room, person_id in schedule[day][time_slot].items():
-                        if person_id and person_id in assigned_persons:
-                            violations['hard_violations'].append(
-                                f"{person_id} double-booked on {day} {time_slot}"
-                            )
-                            violations['total_penalty'] += 1000
-                        elif person_id:
-                            assigned_persons.append(person_id)
+                for person_id in index.double_bookings.get((day, time_slot), ()):
+                    if collect_messages:
+                        violations['hard_violations'].append(
+                            f"{person_id} double-booked on {day} {time_slot}"
+                        )
+                    violations['total_penalty'] += 1000
     
-    def _check_all_required_rooms_filled(self, schedule: Dict, violations: Dict):
+    def _check_all_required_rooms_filled(self, schedule: Dict, violations: Dict, collect_messages: bool):
         """Check that all required rooms in 規則.txt are filled"""
-        for day in self.days:
-            if day in DAILY_ROOM_REQUIREMENTS:
-                for time_slot in self.time_slots:
-                    if time_slot in DAILY_ROOM_REQUIREMENTS[day]:
-                        required_rooms = DAILY_ROOM_REQUIREMENTS[day][time_slot]
-                        
-                        for room in required_rooms:
-                            # Check if room is assigned and has someone
-                            if (not schedule.get(day, {}).get(time_slot, {}).get(room)):
-                                violations['hard_violations'].append(
-                                    f"Required room {room} is empty on {day} {time_slot}"
-                                )
-                                violations['total_penalty'] += 1000
+        for day, time_slot, required_rooms, _ in self._required_slots:
+            assignments = schedule.get(day, {}).get(time_slot, {})
+            
+            for room in required_rooms:
+                # Check if room is assigned and has someone
+                if not assignments.get(room):
+                    if collect_messages:
+                        violations['hard_violations'].append(
+                            f"Required room {room} is empty on {day} {time_slot}"
+                        )
+                    violations['total_penalty'] += 1000
     
-    def _check_health_check_coverage(self, schedule: Dict, violations: Dict):
+    def _check_health_check_coverage(self, schedule: Dict, violations: Dict, collect_messages: bool):
         """Rule 2: Health check rooms must always have someone"""
-        for day in self.days:
-            for time_slot in self.time_slots:
-                if day in DAILY_ROOM_REQUIREMENTS and time_slot in DAILY_ROOM_REQUIREMENTS[day]:
-                    required_rooms = DAILY_ROOM_REQUIREMENTS[day][time_slot]
-                    
-                    for room in ['體檢1', '體檢2']:
-                        if room in required_rooms:
-                            if (not schedule.get(day, {}).get(time_slot, {}).get(room)):
-                                violations['hard_violations'].append(
-                                    f"{room} is empty on {day} {time_slot}"
-                                )
-                                violations['total_penalty'] += 500
+        for day, time_slot, _, health_rooms in self._required_slots:
+            if not health_rooms:
+                continue
+            
+            assignments = schedule.get(day, {}).get(time_slot, {})
+            for room in health_rooms:
+                if not assignments.get(room):
+                    if collect_messages:
+                        violations['hard_violations'].append(
+                            f"{room} is empty on {day} {time_slot}"
+                        )
+                    violations['total_penalty'] += 500
     
-    def _check_no_full_day_assignment(self, schedule: Dict, violations: Dict):
+    def _check_no_full_day_assignment(self, index: _ScheduleIndex, violations: Dict, collect_messages: bool):
         """Rule 3: Same person cannot work both morning and afternoon (except R1 健康)"""
         for day in self.days:
-            morning_workers = set()
-            afternoon_workers = set()
-            
-            if day in schedule:
-                if 'Morning' in schedule[day]:
-                    for room, person_id in schedule[day]['Morning'].items():
-                        if person_id:
-                            morning_workers.add(person_id)
-                
-                if 'Afternoon' in schedule[day]:
-                    for room, person_id in schedule[day]['Afternoon'].items():
-                        if person_id:
-                            afternoon_workers.add(person_id)
+            morning_workers = index.morning_sets.get(day)
+            afternoon_workers = index.afternoon_sets.get(day)
+            if not morning_workers or not afternoon_workers:
+                continue
             
             # Check for violations
             full_day_workers = morning_workers.intersection(afternoon_workers)
             for person_id in full_day_workers:
-                # Check if this is R1 with 健康 rotation unit
-                person_info = self._get_person_info(person_id)
-                if person_info and person_info['level'] == 'R1' and person_info['rotation_unit'] == '健康':
+                if person_id in self._full_day_exempt:
                     # Skip penalty for R1 健康 personnel
                     continue
                 
-                violations['hard_violations'].append(
-                    f"{person_id} assigned both morning and afternoon on {day}"
-                )
+                if collect_messages:
+                    violations['hard_violations'].append(
+                        f"{person_id} assigned both morning and afternoon on {day}"
+                    )
                 violations['total_penalty'] += 800
     
-    def _check_4201_restriction(self, schedule: Dict, violations: Dict):
+    def _check_4201_restriction(self, schedule: Dict, violations: Dict, collect_messages: bool):
         """Check that 4201 can only be assigned to R2 or R3"""
         for day in self.days:
             if day in schedule:
@@ -133,143 +245,140 @@ class FitnessEvaluator:
                             if person_id:
                                 # Get person info
                                 person_info = self._get_person_info(person_id)
-                                if person_info and person_info['level'] not in ['R2', 'R3']:
-                                    violations['hard_violations'].append(
-                                        f"4201 on {day} {time_slot} assigned to {person_id} ({person_info['level']}), must be R2 or R3"
-                                    )
+                                if person_info and person_info['level'] not in _ROOM_4201_LEVELS:
+                                    if collect_messages:
+                                        violations['hard_violations'].append(
+                                            f"4201 on {day} {time_slot} assigned to {person_id} ({person_info['level']}), must be R2 or R3"
+                                        )
                                     violations['total_penalty'] += 600
     
-    def _check_level_specific_rules(self, schedule: Dict, violations: Dict):
+    def _check_level_specific_rules(self, index: _ScheduleIndex, violations: Dict, collect_messages: bool):
         """Check all level-specific rules for R1, R2, R3, R4"""
-        person_assignments = self._get_person_assignments(schedule)
-        
-        for person_id, assignments in person_assignments.items():
+        for person_id, assignments in index.assignments_by_person.items():
             person_info = self._get_person_info(person_id)
             if not person_info:
                 continue
             
-            level = person_info['level']
             rotation_unit = person_info['rotation_unit']
-            rules = self.level_rules.get(level)
+            rules = self._compiled_rules.get((person_info['level'], rotation_unit))
             
             if not rules:
                 continue
             
+            if rules.fixed_assignments is not None or rules.restrictions is not None:
+                rooms_by_slot = self._group_by_slot(assignments)
+            
             # Check fixed assignments
-            if 'fixed_assignments' in rules and rotation_unit in rules['fixed_assignments']:
+            if rules.fixed_assignments is not None:
                 self._check_fixed_assignments(
-                    person_id, assignments, rotation_unit, 
-                    rules['fixed_assignments'][rotation_unit], violations
+                    person_id, rooms_by_slot, rotation_unit, 
+                    rules.fixed_assignments, violations, collect_messages
                 )
             
             # Check restrictions
-            if 'restrictions' in rules and rotation_unit in rules['restrictions']:
+            if rules.restrictions is not None:
                 self._check_restrictions(
-                    person_id, assignments, rotation_unit,
-                    rules['restrictions'][rotation_unit], violations
+                    person_id, assignments, rooms_by_slot, rotation_unit,
+                    rules.restrictions, violations, collect_messages
                 )
             
+            # Shared by the clinic count and special requirement checks
+            non_health_assignments = [a for a in assignments if a[2] not in _HEALTH_ROOMS]
+            
             # Check clinic count limits
-            self._check_clinic_counts(person_id, person_info, assignments, rules, violations)
+            self._check_clinic_counts(
+                person_id, person_info, assignments, non_health_assignments, rules, violations, collect_messages
+            )
             
             # Check special requirements
-            self._check_special_requirements(person_id, person_info, assignments, rules, violations)
+            self._check_special_requirements(
+                person_id, assignments, non_health_assignments, rules, violations, collect_messages
+            )
+    
+    @staticmethod
+    def _group_by_slot(assignments: List[Tuple]) -> Dict[Tuple[str, str], List[str]]:
+        """Map (day, time_slot) to the rooms a person holds in that slot"""
+        rooms_by_slot = {}
+        for day, time_slot, room in assignments:
+            rooms_by_slot.setdefault((day, time_slot), []).append(room)
+        return rooms_by_slot
     
-    def _check_fixed_assignments(self, person_id: str, assignments: List[Tuple], 
-                                rotation_unit: str, fixed_rules: Dict, violations: Dict):
+    def _check_fixed_assignments(self, person_id: str, rooms_by_slot: Dict[Tuple[str, str], List[str]], 
+                                rotation_unit: str, fixed_rules: Tuple, violations: Dict, collect_messages: bool):
         """Check if person follows fixed assignment rules"""
-        for day, time_rules in fixed_rules.items():
-            for time_slot, required_rooms in time_rules.items():
-                if required_rooms:
-                    person_in_slot = any(
-                        a for a in assignments 
-                        if a[0] == day and a[1] == time_slot
-                    )
-                    
-                    if isinstance(required_rooms, list):
-                        # Specific rooms required
-                        correct_room = any(
-                            a for a in assignments 
-                            if a[0] == day and a[1] == time_slot and a[2] in required_rooms
+        for day, time_slot, required_rooms in fixed_rules:
+            rooms_here = rooms_by_slot.get((day, time_slot))
+            
+            if required_rooms is True:
+                # Must work this slot (any room)
+                if rooms_here is None:
+                    if collect_messages:
+                        violations['soft_violations'].append(
+                            f"{person_id} ({rotation_unit}) should work on {day} {time_slot}"
                         )
-                        if not correct_room and person_in_slot:
-                            violations['hard_violations'].append(
-                                f"{person_id} ({rotation_unit}) not in required room on {day} {time_slot}"
-                            )
-                            violations['total_penalty'] += 300
-                    elif required_rooms is True:
-                        # Must work this slot (any room)
-                        if not person_in_slot:
-                            violations['soft_violations'].append(
-                                f"{person_id} ({rotation_unit}) should work on {day} {time_slot}"
-                            )
-                            violations['total_penalty'] += 100
+                    violations['total_penalty'] += 100
+            elif rooms_here is not None and required_rooms.isdisjoint(rooms_here):
+                # Specific rooms required
+                if collect_messages:
+                    violations['hard_violations'].append(
+                        f"{person_id} ({rotation_unit}) not in required room on {day} {time_slot}"
+                    )
+                violations['total_penalty'] += 300
     
     def _check_restrictions(self, person_id: str, assignments: List[Tuple], 
-                           rotation_unit: str, restrictions: Any, violations: Dict):
+                           rooms_by_slot: Dict[Tuple[str, str], List[str]],
+                           rotation_unit: str, restrictions: Any, violations: Dict, collect_messages: bool):
         """Check if person violates any restrictions"""
         if isinstance(restrictions, list):
             # List of restricted slots
+            days_worked = {day for day, _ in rooms_by_slot}
             for restriction in restrictions:
                 if isinstance(restriction, str):
                     # Full day restriction
-                    day_assignments = [a for a in assignments if a[0] == restriction]
-                    if day_assignments:
-                        violations['hard_violations'].append(
-                            f"{person_id} ({rotation_unit}) cannot work on {restriction}"
-                        )
+                    if restriction in days_worked:
+                        if collect_messages:
+                            violations['hard_violations'].append(
+                                f"{person_id} ({rotation_unit}) cannot work on {restriction}"
+                            )
                         violations['total_penalty'] += 400
                 elif isinstance(restriction, tuple) and len(restriction) == 2:
                     # Specific time slot restriction
                     day, time_slot = restriction
-                    slot_assignments = [
-                        a for a in assignments 
-                        if a[0] == day and a[1] == time_slot
-                    ]
-                    if slot_assignments:
-                        violations['hard_violations'].append(
-                            f"{person_id} ({rotation_unit}) cannot work on {day} {time_slot}"
-                        )
+                    if restriction in rooms_by_slot:
+                        if collect_messages:
+                            violations['hard_violations'].append(
+                                f"{person_id} ({rotation_unit}) cannot work on {day} {time_slot}"
+                            )
                         violations['total_penalty'] += 400
         elif isinstance(restrictions, dict) and 'required' in restrictions:
             # Special requirement (e.g., must have health check on specific slot)
             day, time_slot, required_rooms = restrictions['required']
-            has_required = any(
-                a for a in assignments 
-                if a[0] == day and a[1] == time_slot and a[2] in required_rooms
-            )
+            has_required = any(room in required_rooms for room in rooms_by_slot.get((day, time_slot), ()))
             if not has_required:
                 # Check if person has any health check assignment
-                has_health_check = any(a for a in assignments if a[2] in ['體檢1', '體檢2'])
+                has_health_check = any(a for a in assignments if a[2] in _HEALTH_ROOMS)
                 if has_health_check:
-                    violations['soft_violations'].append(
-                        f"{person_id} ({rotation_unit}) should have health check on {day} {time_slot}"
-                    )
+                    if collect_messages:
+                        violations['soft_violations'].append(
+                            f"{person_id} ({rotation_unit}) should have health check on {day} {time_slot}"
+                        )
                     violations['total_penalty'] += 50
     
     def _check_clinic_counts(self, person_id: str, person_info: Dict, 
-                            assignments: List[Tuple], rules: Dict, violations: Dict):
+                            assignments: List[Tuple], non_health_assignments: List[Tuple],
+                            rules: _CompiledRules, violations: Dict, collect_messages: bool):
         """Check if person has correct number of clinics"""
-        non_health_assignments = [
-            a for a in assignments 
-            if a[2] not in ['體檢1', '體檢2']
-        ]
-        health_assignments = [
-            a for a in assignments 
-            if a[2] in ['體檢1', '體檢2']
-        ]
+        # Every assignment is either a clinic or a health check
+        health_count = len(assignments) - len(non_health_assignments)
         
         # Check max non-health clinics
-        max_clinics = rules.get('max_non_health_clinics', float('inf'))
-        
-        # Check special cases
-        if 'special_cases' in rules and person_info['rotation_unit'] in rules['special_cases']:
-            max_clinics = rules['special_cases'][person_info['rotation_unit']]
+        max_clinics = rules.max_clinics
         
         if len(non_health_assignments) > max_clinics:
-            violations['hard_violations'].append(
-                f"{person_id} has {len(non_health_assignments)} clinics, max is {max_clinics}"
-            )
+            if collect_messages:
+                violations['hard_violations'].append(
+                    f"{person_id} has {len(non_health_assignments)} clinics, max is {max_clinics}"
+                )
             violations['total_penalty'] += 200 * (len(non_health_assignments) - max_clinics)
         
         # R1 specific rule: non-health clinics must be in afternoon 4204
@@ -277,24 +386,27 @@ class FitnessEvaluator:
             for assignment in non_health_assignments:
                 day, time_slot, room = assignment
                 if time_slot != 'Afternoon' or room != '4204':
-                    violations['hard_violations'].append(
-                        f"{person_id} (R1) non-health clinic must be in afternoon 4204, but assigned to {room} on {day} {time_slot}"
-                    )
+                    if collect_messages:
+                        violations['hard_violations'].append(
+                            f"{person_id} (R1) non-health clinic must be in afternoon 4204, but assigned to {room} on {day} {time_slot}"
+                        )
                     violations['total_penalty'] += 400
         
         # Check health check requirement
-        if person_info.get('health_check', False) and not health_assignments:
-            violations['hard_violations'].append(
-                f"{person_id} needs health check assignment"
-            )
+        if person_id in self._health_check_required and not health_count:
+            if collect_messages:
+                violations['hard_violations'].append(
+                    f"{person_id} needs health check assignment"
+                )
             violations['total_penalty'] += 300
         
         # R1 "健康" rotation unit must have exactly 8 health check assignments
         if person_info['level'] == 'R1' and person_info['rotation_unit'] == '健康':
-            if len(health_assignments) != 8:
-                violations['hard_violations'].append(
-                    f"{person_id} (健康) must have exactly 8 health check assignments, has {len(health_assignments)}"
-                )
+            if health_count != 8:
+                if collect_messages:
+                    violations['hard_violations'].append(
+                        f"{person_id} (健康) must have exactly 8 health check assignments, has {health_count}"
+                    )
                 violations['total_penalty'] += 800
             
             # Also check if they have the required non-health clinic on Monday afternoon 4204
@@ -303,105 +415,76 @@ class FitnessEvaluator:
                 if a[0] == 'Monday' and a[1] == 'Afternoon' and a[2] == '4204'
             )
             if not monday_afternoon_4204:
-                violations['hard_violations'].append(
-                    f"{person_id} (健康) must work Monday afternoon 4204"
-                )
+                if collect_messages:
+                    violations['hard_violations'].append(
+                        f"{person_id} (健康) must work Monday afternoon 4204"
+                    )
                 violations['total_penalty'] += 400
     
-    def _check_special_requirements(self, person_id: str, person_info: Dict, 
-                                   assignments: List[Tuple], rules: Dict, violations: Dict):
+    def _check_special_requirements(self, person_id: str, 
+                                   assignments: List[Tuple], non_health_assignments: List[Tuple],
+                                   rules: _CompiledRules, violations: Dict, collect_messages: bool):
         """Check special requirements like morning clinic, 4201 requirement, etc."""
-        level = person_info['level']
-        
         # R2, R3 must have exactly one 4201
-        if level in ['R2', 'R3'] and rules.get('require_4201', False):
+        if rules.require_4201:
             room_4201_count = sum(1 for a in assignments if a[2] == '4201')
             if room_4201_count != 1:
-                violations['hard_violations'].append(
-                    f"{person_id} must have exactly one 4201 clinic, has {room_4201_count}"
-                )
+                if collect_messages:
+                    violations['hard_violations'].append(
+                        f"{person_id} must have exactly one 4201 clinic, has {room_4201_count}"
+                    )
                 violations['total_penalty'] += 300
         
         # R3, R4 must have at least one morning clinic
-        if level in ['R3', 'R4'] and rules.get('require_morning', False):
-            morning_clinics = [
-                a for a in assignments 
-                if a[1] == 'Morning' and a[2] not in ['體檢1', '體檢2']
-            ]
+        if rules.require_morning:
+            morning_clinics = [a for a in non_health_assignments if a[1] == 'Morning']
             if not morning_clinics:
-                violations['hard_violations'].append(
-                    f"{person_id} must have at least one morning clinic"
-                )
+                if collect_messages:
+                    violations['hard_violations'].append(
+                        f"{person_id} must have at least one morning clinic"
+                    )
                 violations['total_penalty'] += 200
         
         # R2 must have different time slots
-        if level == 'R2' and rules.get('require_different_times', False):
-            non_health = [a for a in assignments if a[2] not in ['體檢1', '體檢2']]
-            if len(non_health) == 2:
-                if non_health[0][1] == non_health[1][1]:
-                    violations['hard_violations'].append(
-                        f"{person_id} must have clinics at different times"
-                    )
+        if rules.require_different_times:
+            if len(non_health_assignments) == 2:
+                if non_health_assignments[0][1] == non_health_assignments[1][1]:
+                    if collect_messages:
+                        violations['hard_violations'].append(
+                            f"{person_id} must have clinics at different times"
+                        )
                     violations['total_penalty'] += 200
         
         # R4 Tuesday teaching restriction
-        if level == 'R4' and person_info.get('tuesday_teaching', False):
+        if person_id in self._r4_tuesday_teaching:
             tuesday_assignments = [a for a in assignments if a[0] == 'Tuesday']
             if tuesday_assignments:
-                violations['hard_violations'].append(
-                    f"{person_id} has teaching on Tuesday, cannot have clinics"
-                )
+                if collect_messages:
+                    violations['hard_violations'].append(
+                        f"{person_id} has teaching on Tuesday, cannot have clinics"
+                    )
                 violations['total_penalty'] += 500
     
-    def _get_person_assignments(self, schedule: Dict) -> Dict[str, List[Tuple]]:
-        """Get all assignments for each person"""
-        person_assignments = {}
-        
-        for day in schedule:
-            for time_slot in schedule[day]:
-                for room, person_id in schedule[day][time_slot].items():
-                    if person_id:
-                        if person_id not in person_assignments:
-                            person_assignments[person_id] = []
-                        person_assignments[person_id].append((day, time_slot, room))
-        
-        return person_assignments
-    
     def _get_person_info(self, person_id: str) -> Dict:
         """Get person information by ID"""
-        for person in self.personnel_list:
-            if person['id'] == person_id:
-                return person
-        return None
+        return self._person_index.get(person_id)
     
     def _calculate_coverage_score(self, schedule: Dict) -> float:
         """Calculate how well the schedule covers required rooms"""
-        total_required = 0
+        total_required = self._required_count
         total_filled = 0
         
-        for day in self.days:
-            if day in DAILY_ROOM_REQUIREMENTS:
-                for time_slot in self.time_slots:
-                    if time_slot in DAILY_ROOM_REQUIREMENTS[day]:
-                        required_rooms = DAILY_ROOM_REQUIREMENTS[day][time_slot]
-                        total_required += len(required_rooms)
-                        
-                        if day in schedule and time_slot in schedule[day]:
-                            for room in required_rooms:
-                                if schedule[day][time_slot].get(room):
-                                    total_filled += 1
+        for day, time_slot, required_rooms, _ in self._required_slots:
+            assignments = schedule.get(day, {}).get(time_slot, {})
+            for room in required_rooms:
+                if assignments.get(room):
+                    total_filled += 1
         
         return (total_filled / total_required * 100) if total_required > 0 else 0
     
-    def _calculate_distribution_score(self, schedule: Dict) -> float:
+    def _calculate_distribution_score(self, index: _ScheduleIndex) -> float:
         """Calculate how evenly work is distributed"""
-        person_counts = {}
-        
-        for day in schedule:
-            for time_slot in schedule[day]:
-                for room, person_id in schedule[day][time_slot].items():
-                    if person_id:
-                        person_counts[person_id] = person_counts.get(person_id, 0) + 1
+        person_counts = index.person_counts
         
         if not person_counts:
             return 0
@@ -413,38 +496,29 @@ class FitnessEvaluator:
         # Lower variance is better
         return max(0, 20 - variance)
     
-    def _check_r4_fixed_schedules(self, schedule: Dict, violations: Dict):
+    def _check_r4_fixed_schedules(self, index: _ScheduleIndex, violations: Dict, collect_messages: bool):
         """Check if R4 personnel with fixed schedules are assigned correctly"""
-        for person in self.personnel_list:
-            if person['level'] == 'R4' and person.get('fixed_schedule'):
-                person_id = person['id']
-                fixed = person['fixed_schedule']
-                fixed_day = fixed['day']
-                fixed_time = fixed['time_slot']
-                
-                # Check if person is scheduled at the fixed time
-                person_found_at_fixed_time = False
-                if fixed_day in schedule and fixed_time in schedule[fixed_day]:
-                    for room, assigned_person in schedule[fixed_day][fixed_time].items():
-                        if assigned_person == person_id:
-                            person_found_at_fixed_time = True
-                            break
-                
-                if not person_found_at_fixed_time:
+        for person_id, fixed_day, fixed_time in self._r4_fixed_persons:
+            assignments = index.assignments_by_person.get(person_id, ())
+            
+            # Check if person is scheduled at the fixed time
+            person_found_at_fixed_time = any(
+                day == fixed_day and time_slot == fixed_time
+                for day, time_slot, room in assignments
+            )
+            
+            if not person_found_at_fixed_time:
+                if collect_messages:
                     violations['hard_violations'].append(
                         f"{person_id} (R4) must work on {fixed_day} {fixed_time} as specified"
                     )
-                    violations['total_penalty'] += 1000
-                
-                # Check if person is scheduled at any other time (should only have one clinic)
-                total_assignments = 0
-                for day in schedule:
-                    for time_slot in schedule[day]:
-                        for room, assigned_person in schedule[day][time_slot].items():
-                            if assigned_person == person_id:
-                                total_assignments += 1
-                                if (day != fixed_day or time_slot != fixed_time) and room not in ['體檢1', '體檢2']:
-                                    violations['hard_violations'].append(
-                                        f"{person_id} (R4) with fixed schedule should only work at {fixed_day} {fixed_time}"
-                                    )
-                                    violations['total_penalty'] += 800
\ No newline at end of file
+                violations['total_penalty'] += 1000
+            
+            # Check if person is scheduled at any other time (should only have one clinic)
+            for day, time_slot, room in assignments:
+                if (day != fixed_day or time_slot != fixed_time) and room not in _HEALTH_ROOMS:
+                    if collect_messages:
+                        violations['hard_violations'].append(
+                            f"{person_id} (R4) with fixed schedule should only work at {fixed_day} {fixed_time}"
+                        )
+                    violations['total_penalty'] += 800
\ No newline at end of file
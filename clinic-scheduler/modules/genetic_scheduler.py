@@ -1,5 +1,5 @@
 import numpy as np
-import random
+from collections import OrderedDict
 from typing import List, Dict, Tuple, Any
 import copy
 from config.settings import Config
@@ -22,6 +22,7 @@ class GeneticScheduler:
         self.crossover_rate = ga_config['crossover_rate']
         self.tournament_size = ga_config['tournament_size']
         self.convergence_threshold = ga_config['convergence_threshold']
+        self.fitness_cache_size = ga_config['fitness_cache_size']
         
         # Schedule structure
         self.weeks = Config.TOTAL_WEEKS
@@ -35,9 +36,30 @@ class GeneticScheduler:
         self.best_solution = None
         self.no_improvement_count = 0
         
+        # One generator for every random draw; its batched calls back the vectorized operators
+        self.rng = np.random.default_rng()
+        
+        # Fitness of recently evaluated chromosomes; elites and unchanged children repeat
+        self._fitness_cache = OrderedDict()
+        
         # Create personnel list with metadata
         self.personnel_list = self._create_personnel_list()
         
+        # Per-person flags indexed by chromosome value, for vectorized constraint checks
+        self._teaching_mask = np.array([p['tuesday_teaching'] for p in self.personnel_list], dtype=bool)
+        self._health_check_mask = np.array([p['health_check'] for p in self.personnel_list], dtype=bool)
+        self._tuesday_idx = self.days.index('Tuesday')
+        self._r1_health_check = np.array([
+            i for i, p in enumerate(self.personnel_list)
+            if p['level'] == 'R1' and p['health_check']
+        ], dtype=int)
+        
+        # Clinic count bounds per person from the rotation unit constraints; unconstrained units never bind
+        unit_constraints = self.rules.get('unit_constraints', {})
+        person_constraints = [unit_constraints.get(p['rotation_unit'], {}) for p in self.personnel_list]
+        self._min_clinics = np.array([c.get('min_clinics', 0) for c in person_constraints], dtype=float)
+        self._max_clinics = np.array([c.get('max_clinics', float('inf')) for c in person_constraints], dtype=float)
+        
     def _create_personnel_list(self) -> List[Dict]:
         """Create flat list of all personnel with their metadata"""
         personnel_list = []
@@ -60,172 +82,133 @@ class GeneticScheduler:
         complexity_factor = self.total_personnel / 21  # 21 is default total
         return int(base_size * max(1.0, complexity_factor ** 1.5))
     
-    def initialize_population(self) -> List[np.ndarray]:
-        """Create initial population with R1-focused strategy"""
-        population = []
+    def initialize_population(self) -> np.ndarray:
+        """Create initial population with R1-focused strategy, one chromosome per row"""
+        total_rooms = len(self.clinic_rooms) + len(self.health_check_rooms)
+        population = np.empty(
+            (self.population_size, self.weeks, len(self.days), len(self.time_slots), total_rooms),
+            dtype=int
+        )
         
         # Generate chromosomes prioritizing R1 assignments
-        for _ in range(self.population_size):
-            chromosome = self.create_r1_focused_chromosome()
-            population.append(chromosome)
+        for i in range(self.population_size):
+            population[i] = self.create_r1_focused_chromosome()
             
         return population
     
     def create_r1_focused_chromosome(self) -> np.ndarray:
         """Create a chromosome with R1 personnel prioritized for health checks"""
         # Initialize empty schedule (weeks x days x time_slots x rooms)
-        total_rooms = len(self.clinic_rooms) + len(self.health_check_rooms)
+        clinic_count = len(self.clinic_rooms)
+        slots_shape = (self.weeks, len(self.days), len(self.time_slots))
         chromosome = np.full(
-            (self.weeks, len(self.days), len(self.time_slots), total_rooms),
+            slots_shape + (clinic_count + len(self.health_check_rooms),),
             -1,  # -1 means no assignment
             dtype=int
         )
         
-        # Get R1 personnel who can do health checks
-        r1_health_check = [
-            i for i, p in enumerate(self.personnel_list)
-            if p['level'] == 'R1' and p['health_check']
-        ]
-        
-        # First, assign R1 personnel to health check rooms
-        for week in range(self.weeks):
-            for day_idx, day in enumerate(self.days):
-                for time_idx, time_slot in enumerate(self.time_slots):
-                    # Skip Tuesday teaching slots for R4
-                    if day == 'Tuesday' and any(
-                        p['tuesday_teaching'] for p in self.personnel_list
-                    ):
-                        continue
-                    
-                    # Assign health check rooms first
-                    health_room_offset = len(self.clinic_rooms)
-                    for room_idx in range(len(self.health_check_rooms)):
-                        if r1_health_check:
-                            person_idx = random.choice(r1_health_check)
-                            chromosome[week, day_idx, time_idx, health_room_offset + room_idx] = person_idx
-        
-        # Then assign remaining personnel to clinic rooms
-        for week in range(self.weeks):
-            for day_idx, day in enumerate(self.days):
-                for time_idx, time_slot in enumerate(self.time_slots):
-                    # Get available personnel for this slot
-                    available = self._get_available_personnel(
-                        chromosome, week, day_idx, time_idx
-                    )
-                    
-                    # Assign to clinic rooms
-                    room_indices = list(range(len(self.clinic_rooms)))
-                    random.shuffle(room_indices)
-                    
-                    for room_idx in room_indices:
-                        if available:
-                            person_idx = random.choice(available)
-                            chromosome[week, day_idx, time_idx, room_idx] = person_idx
-                            available.remove(person_idx)
+        # First, assign R1 personnel who can do health checks to health check rooms
+        health_rooms = chromosome[..., clinic_count:]
+        if len(self._r1_health_check):
+            health_rooms[...] = self.rng.choice(self._r1_health_check, size=health_rooms.shape)
+            # Skip Tuesday teaching slots for R4
+            if self._teaching_mask.any():
+                health_rooms[:, self._tuesday_idx] = -1
+        
+        # Then assign remaining personnel to clinic rooms, drawn without replacement per slot
+        person_count = len(self.personnel_list)
+        unavailable = (health_rooms[..., None] == np.arange(person_count)).any(axis=-2)
+        unavailable[:, self._tuesday_idx] |= self._teaching_mask
+        
+        # Sorting random keys gives each slot a random order of its available personnel first
+        keys = self.rng.random(slots_shape + (person_count,))
+        keys[unavailable] = np.inf
+        order = np.argsort(keys, axis=-1)[..., :clinic_count]
+        picked = np.where(np.isfinite(np.take_along_axis(keys, order, axis=-1)), order, -1)
+        
+        # Spread picks over randomly ordered rooms so any shortfall leaves random rooms empty
+        clinic_rooms = np.full(slots_shape + (clinic_count,), -1, dtype=int)
+        clinic_rooms[..., :picked.shape[-1]] = picked
+        room_order = np.argsort(self.rng.random(clinic_rooms.shape), axis=-1)
+        chromosome[..., :clinic_count] = np.take_along_axis(clinic_rooms, room_order, axis=-1)
                             
         return chromosome
     
-    def _get_available_personnel(self, chromosome: np.ndarray, week: int, 
-                                day_idx: int, time_idx: int) -> List[int]:
-        """Get list of personnel available for assignment"""
-        # Get already assigned personnel in this time slot
-        assigned = set(chromosome[week, day_idx, time_idx, :])
-        assigned.discard(-1)  # Remove empty slots
-        
-        available = []
-        for i, person in enumerate(self.personnel_list):
-            # Skip if already assigned
-            if i in assigned:
-                continue
-                
-            # Skip R4 with Tuesday teaching
-            if (self.days[day_idx] == 'Tuesday' and 
-                person['tuesday_teaching']):
-                continue
-                
-            available.append(i)
-            
-        return available
-    
     def fitness(self, chromosome: np.ndarray) -> float:
+        """Calculate fitness score for a chromosome, reusing scores of identical chromosomes"""
+        key = chromosome.tobytes()
+        cache = self._fitness_cache
+        fitness_score = cache.get(key)
+        if fitness_score is not None:
+            cache.move_to_end(key)
+            return fitness_score
+        
+        fitness_score = self._calculate_fitness(chromosome)
+        cache[key] = fitness_score
+        if len(cache) > self.fitness_cache_size:
+            cache.popitem(last=False)
+        return fitness_score
+    
+    def _calculate_fitness(self, chromosome: np.ndarray) -> float:
         """Calculate fitness score for a chromosome"""
         score = 0.0
         penalties = 0.0
         
+        # Filled cells, shared by the checks below
+        filled = chromosome >= 0
+        clinic_count = len(self.clinic_rooms)
+        
         # Check hard constraints
         # 1. No person in multiple rooms at same time
-        for week in range(self.weeks):
-            for day in range(len(self.days)):
-                for time in range(len(self.time_slots)):
-                    assignments = chromosome[week, day, time, :]
-                    valid_assignments = assignments[assignments >= 0]
-                    if len(valid_assignments) != len(set(valid_assignments)):
-                        penalties += 100  # Heavy penalty for double booking
+        # Sorting each slot's rooms puts repeated people next to each other
+        rooms_sorted = np.sort(chromosome, axis=-1)
+        repeats = (rooms_sorted[..., 1:] == rooms_sorted[..., :-1]) & (rooms_sorted[..., 1:] >= 0)
+        penalties += 100 * int(np.count_nonzero(repeats.any(axis=-1)))  # Heavy penalty per double-booked slot
         
         # 2. Health check rooms must be filled by appropriate personnel
-        health_room_offset = len(self.clinic_rooms)
-        for week in range(self.weeks):
-            for day in range(len(self.days)):
-                for time in range(len(self.time_slots)):
-                    for room_idx in range(len(self.health_check_rooms)):
-                        person_idx = chromosome[week, day, time, health_room_offset + room_idx]
-                        if person_idx >= 0:
-                            person = self.personnel_list[person_idx]
-                            if not person['health_check']:
-                                penalties += 50  # Penalty for wrong assignment
-                        else:
-                            penalties += 20  # Penalty for empty health check room
+        health_rooms = chromosome[..., clinic_count:]
+        health_filled = filled[..., clinic_count:]
+        wrong_people = np.count_nonzero(~self._health_check_mask[health_rooms[health_filled]])
+        empty_rooms = health_filled.size - np.count_nonzero(health_filled)
+        penalties += 50 * wrong_people  # Penalty for wrong assignment
+        penalties += 20 * empty_rooms  # Penalty for empty health check room
         
         # 3. R4 Tuesday teaching constraint
-        for week in range(self.weeks):
-            tuesday_idx = self.days.index('Tuesday')
-            for time in range(len(self.time_slots)):
-                assignments = chromosome[week, tuesday_idx, time, :]
-                for person_idx in assignments:
-                    if person_idx >= 0:
-                        person = self.personnel_list[person_idx]
-                        if person['tuesday_teaching']:
-                            penalties += 100  # Heavy penalty
+        tuesday_assignments = chromosome[:, self._tuesday_idx][filled[:, self._tuesday_idx]]
+        penalties += 100 * int(np.count_nonzero(self._teaching_mask[tuesday_assignments]))  # Heavy penalty
+        
+        # Assignments per person, counted in one pass
+        assignment_counts = np.bincount(chromosome[filled], minlength=len(self.personnel_list))
         
         # 4. Rotation unit constraints
-        for person_idx, person in enumerate(self.personnel_list):
-            unit = person['rotation_unit']
-            if unit in self.rules.get('unit_constraints', {}):
-                constraints = self.rules['unit_constraints'][unit]
-                
-                # Count assignments
-                person_assignments = np.sum(chromosome == person_idx)
-                
-                min_clinics = constraints.get('min_clinics', 0)
-                max_clinics = constraints.get('max_clinics', float('inf'))
-                
-                if person_assignments < min_clinics:
-                    penalties += 10 * (min_clinics - person_assignments)
-                elif person_assignments > max_clinics:
-                    penalties += 10 * (person_assignments - max_clinics)
+        out_of_range = np.where(
+            assignment_counts < self._min_clinics,
+            self._min_clinics - assignment_counts,
+            np.where(assignment_counts > self._max_clinics, assignment_counts - self._max_clinics, 0)
+        )
+        penalties += 10 * float(out_of_range.sum())
         
         # 5. Calculate coverage score
         total_slots = self.weeks * len(self.days) * len(self.time_slots) * len(self.clinic_rooms)
-        filled_slots = np.sum(chromosome[:, :, :, :len(self.clinic_rooms)] >= 0)
+        filled_slots = filled[..., :clinic_count].sum()
         coverage_score = (filled_slots / total_slots) * 100
         
         # 6. Distribution score (prefer even distribution)
-        distribution_score = self._calculate_distribution_score(chromosome)
+        distribution_score = self._calculate_distribution_score(assignment_counts)
         
         # Calculate final fitness
         fitness = coverage_score + distribution_score - penalties
         
         return fitness
     
-    def _calculate_distribution_score(self, chromosome: np.ndarray) -> float:
+    def _count_assignments(self, chromosome: np.ndarray) -> np.ndarray:
+        """Number of assigned slots per person, indexed like personnel_list"""
+        assigned = chromosome[chromosome >= 0]
+        return np.bincount(assigned, minlength=len(self.personnel_list))
+    
+    def _calculate_distribution_score(self, assignments_per_person: np.ndarray) -> float:
         """Calculate how evenly work is distributed"""
-        assignments_per_person = []
-        
-        for person_idx in range(len(self.personnel_list)):
-            count = np.sum(chromosome == person_idx)
-            assignments_per_person.append(count)
-        
-        if not assignments_per_person:
+        if len(assignments_per_person) == 0:
             return 0.0
             
         mean_assignments = np.mean(assignments_per_person)
@@ -241,59 +224,72 @@ class GeneticScheduler:
     
     def crossover(self, parent1: np.ndarray, parent2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """Perform crossover between two parents"""
-        if random.random() > self.crossover_rate:
-            return parent1.copy(), parent2.copy()
-        
-        child1 = parent1.copy()
-        child2 = parent2.copy()
+        children = np.stack([parent1, parent2])
+        self._crossover_pairs(children)
+        return children[0], children[1]
+    
+    def _crossover_pairs(self, children: np.ndarray):
+        """Cross over each consecutive pair of rows in place"""
+        pairs = len(children) // 2
+        first, second = children[0:2 * pairs:2], children[1:2 * pairs:2]
         
+        # Per pair, which (week, day) cells come from the other parent
+        swap = np.zeros((pairs, self.weeks, len(self.days)), dtype=bool)
         if self.weeks > 1:
             # Week-based crossover for multiple weeks
-            crossover_point = random.randint(1, self.weeks - 1)
-            child1[crossover_point:] = parent2[crossover_point:]
-            child2[crossover_point:] = parent1[crossover_point:]
+            crossover_points = self.rng.integers(1, self.weeks, size=pairs)
+            swap[:] = (np.arange(self.weeks) >= crossover_points[:, None])[:, :, None]
         else:
             # Day-based crossover for single week
-            crossover_day = random.randint(1, len(self.days) - 1)
-            child1[0, crossover_day:] = parent2[0, crossover_day:]
-            child2[0, crossover_day:] = parent1[0, crossover_day:]
+            crossover_days = self.rng.integers(1, len(self.days), size=pairs)
+            swap[:, 0] = np.arange(len(self.days)) >= crossover_days[:, None]
+        swap &= (self.rng.random(pairs) <= self.crossover_rate)[:, None, None]
         
-        return child1, child2
+        swap = swap[..., None, None]
+        first[...], second[...] = np.where(swap, second, first), np.where(swap, first, second)
     
     def mutate(self, chromosome: np.ndarray) -> np.ndarray:
         """Perform mutation on a chromosome"""
-        if random.random() > self.mutation_rate:
-            return chromosome
-        
-        mutated = chromosome.copy()
+        mutated = chromosome[None].copy()
+        self._mutate_rows(mutated)
+        return mutated[0]
+    
+    def _mutate_rows(self, population: np.ndarray):
+        """Perform mutation in place on rows picked at the mutation rate"""
+        rows = np.flatnonzero(self.rng.random(len(population)) <= self.mutation_rate)
         
-        # Random swap mutation
-        num_mutations = random.randint(1, 3)
+        # Random swap mutation, one round per swap so each row changes once per round
+        num_mutations = self.rng.integers(1, 4, size=len(rows))
+        total_rooms = len(self.clinic_rooms) + len(self.health_check_rooms)
         
-        for _ in range(num_mutations):
+        for round_idx in range(num_mutations.max(initial=0)):
+            active = rows[num_mutations > round_idx]
+            
             # Select random time slot
-            week = random.randint(0, self.weeks - 1)
-            day = random.randint(0, len(self.days) - 1)
-            time = random.randint(0, len(self.time_slots) - 1)
+            week = self.rng.integers(0, self.weeks, size=len(active))
+            day = self.rng.integers(0, len(self.days), size=len(active))
+            time = self.rng.integers(0, len(self.time_slots), size=len(active))
             
             # Select two random rooms
-            room1 = random.randint(0, len(self.clinic_rooms) + len(self.health_check_rooms) - 1)
-            room2 = random.randint(0, len(self.clinic_rooms) + len(self.health_check_rooms) - 1)
+            room1 = self.rng.integers(0, total_rooms, size=len(active))
+            room2 = self.rng.integers(0, total_rooms, size=len(active))
             
             # Swap assignments
-            temp = mutated[week, day, time, room1]
-            mutated[week, day, time, room1] = mutated[week, day, time, room2]
-            mutated[week, day, time, room2] = temp
-        
-        return mutated
+            temp = population[active, week, day, time, room1]
+            population[active, week, day, time, room1] = population[active, week, day, time, room2]
+            population[active, week, day, time, room2] = temp
     
-    def tournament_selection(self, population: List[np.ndarray], 
+    def tournament_selection(self, population: np.ndarray, 
                            fitness_scores: List[float]) -> np.ndarray:
         """Select individual using tournament selection"""
-        tournament_indices = random.sample(range(len(population)), self.tournament_size)
-        tournament_fitness = [fitness_scores[i] for i in tournament_indices]
-        winner_idx = tournament_indices[np.argmax(tournament_fitness)]
-        return population[winner_idx]
+        return population[self._tournament_winners(np.asarray(fitness_scores), 1)[0]]
+    
+    def _tournament_winners(self, fitness_scores: np.ndarray, count: int) -> np.ndarray:
+        """Select population indices of count winners, one tournament each"""
+        # Contestants are drawn with replacement; repeats are rare for tournaments far smaller than the population
+        tournament_indices = self.rng.integers(0, len(fitness_scores), size=(count, self.tournament_size))
+        winners = fitness_scores[tournament_indices].argmax(axis=1)
+        return tournament_indices[np.arange(count), winners]
     
     def run(self) -> Dict[str, Any]:
         """Run the genetic algorithm"""
@@ -302,7 +298,7 @@ class GeneticScheduler:
         
         for generation in range(self.generations):
             # Calculate fitness for all individuals
-            fitness_scores = [self.fitness(chromosome) for chromosome in population]
+            fitness_scores = np.array([self.fitness(chromosome) for chromosome in population])
             
             # Track best solution
             best_idx = np.argmax(fitness_scores)
@@ -318,30 +314,19 @@ class GeneticScheduler:
                 print(f"Converged at generation {generation}")
                 break
             
-            # Create new population
-            new_population = []
-            
             # Elitism - keep best individuals
             elite_indices = np.argsort(fitness_scores)[-self.elite_size:]
-            for idx in elite_indices:
-                new_population.append(population[idx].copy())
             
-            # Generate rest of population
-            while len(new_population) < self.population_size:
-                # Selection
-                parent1 = self.tournament_selection(population, fitness_scores)
-                parent2 = self.tournament_selection(population, fitness_scores)
-                
-                # Crossover
-                child1, child2 = self.crossover(parent1, parent2)
-                
-                # Mutation
-                child1 = self.mutate(child1)
-                child2 = self.mutate(child2)
-                
-                new_population.extend([child1, child2])
+            # Rest of population from tournament-selected parent pairs; an odd count gets a spare child to trim
+            child_count = self.population_size - len(elite_indices)
+            parent_indices = self._tournament_winners(fitness_scores, child_count + child_count % 2)
+            
+            # One gather copies elites and parents into the new population; children then change in place
+            new_population = population[np.concatenate([elite_indices, parent_indices])]
+            children = new_population[len(elite_indices):]
+            self._crossover_pairs(children)
+            self._mutate_rows(children)
             
-            # Trim to exact population size
             population = new_population[:self.population_size]
         
         # Convert best solution to schedule format
@@ -416,10 +401,10 @@ class GeneticScheduler:
         }
         
         # Count assignments per person
+        assignment_counts = self._count_assignments(chromosome)
         for person_idx, person in enumerate(self.personnel_list):
-            count = np.sum(chromosome == person_idx)
             # Convert numpy int64 to Python int
-            stats['assignments_per_person'][person['id']] = int(count)
+            stats['assignments_per_person'][person['id']] = int(assignment_counts[person_idx])
         
         # Calculate coverage rates
         clinic_filled = np.sum(chromosome[:, :, :, :len(self.clinic_rooms)] >= 0)
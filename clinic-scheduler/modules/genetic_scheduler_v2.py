@@ -1,17 +1,19 @@
 """Genetic Algorithm Scheduler V2 - Based on strict rules from 規則.txt"""
 import random
-from typing import List, Dict, Tuple, Any
-import copy
+import time
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Any, Callable, Optional
 from config.settings import Config
 from modules.fitness_evaluator import FitnessEvaluator
 from modules.schedule_requirements import (
     DAILY_ROOM_REQUIREMENTS, R1_RULES, R2_RULES, R3_RULES, R4_RULES
 )
 from modules.r1_scheduler import R1Scheduler
+from modules.data_handler import thaw_rules
 
 class GeneticSchedulerV2:
     def __init__(self, personnel_data: Dict, rules: Dict, 
-                 population_size: int = None, generations: int = 1000):
+                 population_size: int = None, generations: int = None):
         """Initialize genetic scheduler with personnel data and rules"""
         self.personnel_data = personnel_data
         self.rules = rules
@@ -20,12 +22,13 @@ class GeneticSchedulerV2:
         # Dynamic GA parameters
         ga_config = Config.get_ga_config(self.total_personnel)
         self.population_size = population_size or ga_config['population_size']
-        self.generations = generations
+        self.generations = generations or ga_config['max_generations']
         self.elite_size = int(self.population_size * ga_config['elite_percentage'])
         self.mutation_rate = ga_config['mutation_rate']
         self.crossover_rate = ga_config['crossover_rate']
         self.tournament_size = ga_config['tournament_size']
         self.convergence_threshold = ga_config['convergence_threshold']
+        self.fitness_cache_size = ga_config['fitness_cache_size']
         
         # Schedule structure
         self.days = Config.WEEKDAYS
@@ -36,6 +39,9 @@ class GeneticSchedulerV2:
         self.best_solution = None
         self.no_improvement_count = 0
         
+        # Fitness of recently evaluated schedules; elites and unchanged children repeat
+        self._fitness_cache = OrderedDict()
+        
         # Create personnel list with metadata
         self.personnel_list = self._create_personnel_list()
         
@@ -61,6 +67,12 @@ class GeneticSchedulerV2:
         # Pre-schedule R4 fixed clinics
         self.r4_fixed_schedule = self._create_r4_fixed_schedule()
     
+    def __getstate__(self) -> Dict:
+        """Pickle rules as plain dicts; callers may pass frozen rules"""
+        state = self.__dict__.copy()
+        state['rules'] = thaw_rules(self.rules)
+        return state
+    
     def _create_personnel_list(self) -> List[Dict]:
         """Create flat list of all personnel with their metadata"""
         personnel_list = []
@@ -110,8 +122,19 @@ class GeneticSchedulerV2:
         
         return fixed_schedule
     
-    def run(self) -> Dict[str, Any]:
-        """Run genetic algorithm to find optimal schedule"""
+    def run(self, progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+            time_limit: Optional[float] = None,
+            should_stop: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """Run genetic algorithm to find optimal schedule
+        
+        progress_callback, if given, is called once per generation with
+        the generation number, best fitness so far and percent complete.
+        time_limit, if given, stops evolution after that many seconds and
+        returns the best schedule found so far. should_stop, if given, is
+        checked once per generation and ends evolution the same way.
+        """
+        deadline = time.monotonic() + time_limit if time_limit is not None else None
+        
         # Initialize population
         population = self.initialize_population()
         
@@ -124,16 +147,31 @@ class GeneticSchedulerV2:
             best_idx = max(range(len(fitness_scores)), key=lambda i: fitness_scores[i])
             if fitness_scores[best_idx] > self.best_fitness:
                 self.best_fitness = fitness_scores[best_idx]
-                self.best_solution = copy.deepcopy(population[best_idx])
+                self.best_solution = self._copy_schedule(population[best_idx])
                 self.no_improvement_count = 0
             else:
                 self.no_improvement_count += 1
             
+            if progress_callback:
+                progress_callback({
+                    'generation': generation + 1,
+                    'best_fitness': float(self.best_fitness),
+                    'progress': int((generation + 1) * 100 / self.generations)
+                })
+            
             # Check for convergence
             if self.no_improvement_count >= self.convergence_threshold:
                 print(f"Converged at generation {generation}")
                 break
             
+            if deadline is not None and time.monotonic() >= deadline:
+                print(f"Time limit reached at generation {generation}")
+                break
+            
+            if should_stop is not None and should_stop():
+                print(f"Stopped at generation {generation}")
+                break
+            
             # Create new population
             new_population = []
             
@@ -142,7 +180,7 @@ class GeneticSchedulerV2:
                                  key=lambda i: fitness_scores[i], 
                                  reverse=True)[:self.elite_size]
             for idx in elite_indices:
-                new_population.append(copy.deepcopy(population[idx]))
+                new_population.append(self._copy_schedule(population[idx]))
             
             # Generate new individuals
             while len(new_population) < self.population_size:
@@ -201,7 +239,7 @@ class GeneticSchedulerV2:
     def _create_initial_schedule(self) -> Dict:
         """Create a single initial schedule"""
         # Start with pre-scheduled R1 assignments
-        schedule = copy.deepcopy(self.r1_fixed_schedule)
+        schedule = self._copy_schedule(self.r1_fixed_schedule)
         
         # Add pre-scheduled R4 assignments
         for day, time_slots in self.r4_fixed_schedule.items():
@@ -291,6 +329,16 @@ class GeneticSchedulerV2:
                 for room, person_id in rooms.items():
                     schedule[day][time_slot][room] = person_id
     
+    @staticmethod
+    def _copy_day(day_schedule: Dict) -> Dict:
+        """Copy one day of a schedule (time_slot -> room -> person_id)"""
+        return {time_slot: dict(rooms) for time_slot, rooms in day_schedule.items()}
+    
+    @classmethod
+    def _copy_schedule(cls, schedule: Dict) -> Dict:
+        """Copy a schedule; cheaper than deepcopy since leaves are plain strings"""
+        return {day: cls._copy_day(time_slots) for day, time_slots in schedule.items()}
+    
     def _get_available_personnel(self, day: str, time_slot: str, 
                                 room: str, schedule: Dict) -> List[str]:
         """Get list of personnel available for a specific slot"""
@@ -368,8 +416,23 @@ class GeneticSchedulerV2:
         return None
     
     def fitness(self, schedule: Dict) -> float:
-        """Calculate fitness score for a schedule"""
-        fitness_score, _ = self.fitness_evaluator.evaluate(schedule)
+        """Calculate fitness score for a schedule, reusing scores of identical schedules"""
+        # Labels keep the key faithful however each schedule's dicts are ordered
+        key = tuple(
+            (day, time_slot, tuple(assignments.items()))
+            for day, day_schedule in schedule.items()
+            for time_slot, assignments in day_schedule.items()
+        )
+        cache = self._fitness_cache
+        fitness_score = cache.get(key)
+        if fitness_score is not None:
+            cache.move_to_end(key)
+            return fitness_score
+        
+        fitness_score = self.fitness_evaluator.evaluate_fast(schedule)
+        cache[key] = fitness_score
+        if len(cache) > self.fitness_cache_size:
+            cache.popitem(last=False)
         return fitness_score
     
     def tournament_selection(self, population: List[Dict], 
@@ -378,15 +441,16 @@ class GeneticSchedulerV2:
         tournament_indices = random.sample(range(len(population)), 
                                          min(self.tournament_size, len(population)))
         winner_idx = max(tournament_indices, key=lambda i: fitness_scores[i])
-        return copy.deepcopy(population[winner_idx])
+        # No copy here: crossover always builds fresh children from its parents
+        return population[winner_idx]
     
     def crossover(self, parent1: Dict, parent2: Dict) -> Tuple[Dict, Dict]:
         """Perform crossover between two parents"""
         if random.random() > self.crossover_rate:
-            return copy.deepcopy(parent1), copy.deepcopy(parent2)
+            return self._copy_schedule(parent1), self._copy_schedule(parent2)
         
-        child1 = copy.deepcopy(parent1)
-        child2 = copy.deepcopy(parent2)
+        child1 = self._copy_schedule(parent1)
+        child2 = self._copy_schedule(parent2)
         
         # Day-based crossover
         crossover_day = random.choice(self.days[1:])
@@ -396,8 +460,8 @@ class GeneticSchedulerV2:
         for i in range(crossover_idx, len(self.days)):
             day = self.days[i]
             if day in parent1 and day in parent2:
-                child1[day] = copy.deepcopy(parent2[day])
-                child2[day] = copy.deepcopy(parent1[day])
+                child1[day] = self._copy_day(parent2[day])
+                child2[day] = self._copy_day(parent1[day])
         
         # Restore R1 clinic assignments (they should never change)
         self._restore_r1_clinics(child1)
@@ -418,7 +482,7 @@ class GeneticSchedulerV2:
         if random.random() > self.mutation_rate:
             return schedule
         
-        mutated = copy.deepcopy(schedule)
+        mutated = self._copy_schedule(schedule)
         
         # Try a few mutations
         num_mutations = random.randint(1, 3)
@@ -519,4 +583,21 @@ class GeneticSchedulerV2:
         stats['coverage_rate'] = float(stats['coverage_rate'])
         stats['health_check_coverage'] = float(stats['health_check_coverage'])
         
-        return stats
\ No newline at end of file
+        return stats
+
+
+def run_scheduler(scheduler: GeneticSchedulerV2, progress_queue=None,
+                  time_limit: Optional[float] = None, stop_event=None) -> Dict[str, Any]:
+    """Run a scheduler (e.g. in a worker process), putting progress updates on a queue
+
+    Setting stop_event ends the run early with the best schedule found so far.
+    """
+    progress_callback = progress_queue.put if progress_queue is not None else None
+    should_stop = stop_event.is_set if stop_event is not None else None
+    return scheduler.run(progress_callback=progress_callback, time_limit=time_limit,
+                         should_stop=should_stop)
+
+
+def warm_up_worker() -> bool:
+    """No-op submitted to a fresh worker process so its imports finish before real work"""
+    return True
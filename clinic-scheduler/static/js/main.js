@@ -667,6 +667,48 @@ function hideLoading() {
     }
 }
 
+// Update loading overlay message
+function updateLoading(message) {
+    const text = document.querySelector('#loadingOverlay p');
+    if (text) {
+        text.textContent = message;
+    }
+}
+
+// Wait for a background scheduling task to finish, streaming its progress
+function waitForTask(taskId) {
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`/api/progress-stream/${taskId}`);
+
+        source.onmessage = (event) => {
+            const message = JSON.parse(event.data);
+
+            if (message.type === 'progress') {
+                updateLoading(`基因演算法進行中... 第 ${message.generation} 代 (${message.progress}%)`);
+                return;
+            }
+
+            source.close();
+            if (message.status === 'completed') {
+                resolve(message.result);
+            } else {
+                resolve({
+                    success: false,
+                    error: message.error,
+                    details: message.details
+                });
+            }
+        };
+
+        source.onerror = () => {
+            // EventSource reconnects by itself unless the server refused the stream
+            if (source.readyState === EventSource.CLOSED) {
+                reject(new Error('無法取得排班進度'));
+            }
+        };
+    });
+}
+
 // Real-time validation
 document.addEventListener('change', async function(event) {
     if (event.target.tagName === 'SELECT' && event.target.name.includes('_unit')) {
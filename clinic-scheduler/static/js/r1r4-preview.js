@@ -267,7 +267,12 @@ async function confirmR1R4Schedule() {
             hideLoading();
             return;
         }
-        
+
+        // Schedule runs in the background; wait for the final result
+        if (result.success) {
+            result = await waitForTask(result.task_id);
+        }
+
         if (result.success) {
             // Store result data
             currentTaskId = result.task_id;
@@ -0,0 +1,270 @@
+import unittest
+import sys
+import os
+import threading
+import time
+import orjson
+import numpy as np
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from modules.cache import TTLCache
+
+
+def valid_payload():
+    """A small valid scheduling request"""
+    return {
+        'personnel_counts': {'R1': 2, 'R2': 2, 'R3': 1, 'R4': 1},
+        'personnel': {
+            'R1': {
+                'R1_A': {'rotation_unit': '健康', 'health_check': True},
+                'R1_B': {'rotation_unit': '內科病房', 'health_check': True}
+            },
+            'R2': {
+                'R2_A': {'rotation_unit': '婦產門診', 'health_check': True},
+                'R2_B': {'rotation_unit': '社區2', 'health_check': False}
+            },
+            'R3': {
+                'R3_A': {'rotation_unit': 'CR', 'health_check': True}
+            },
+            'R4': {
+                'R4_A': {'rotation_unit': '睡眠門診', 'health_check': False, 'tuesday_teaching': True}
+            }
+        }
+    }
+
+
+def read_events(response):
+    """Decode the data messages of a Server-Sent Events response"""
+    body = response.get_data()
+    return [orjson.loads(line[6:]) for line in body.splitlines() if line.startswith(b'data: ')]
+
+
+def tearDownModule():
+    """Stop the GA helper processes started by the task flow tests"""
+    app_module.ga_process_pool.shutdown()
+    if app_module._progress_manager is not None:
+        app_module._progress_manager.shutdown()
+
+
+class TestOrjsonProvider(unittest.TestCase):
+    """Test cases for the orjson-backed Flask JSON provider"""
+    
+    def test_dumps_numpy_and_non_string_keys(self):
+        """Test that numpy values and non-string keys serialize"""
+        dumped = app_module.app.json.dumps({1: np.int64(2), 'x': np.array([1.5])})
+        self.assertEqual(orjson.loads(dumped), {'1': 2, 'x': [1.5]})
+        
+    def test_response_keeps_key_order(self):
+        """Test that responses keep insertion order instead of sorting keys"""
+        with app_module.app.app_context():
+            response = app_module.app.json.response({'Tuesday': 1, 'Monday': 2})
+        self.assertEqual(list(orjson.loads(response.get_data())), ['Tuesday', 'Monday'])
+        self.assertEqual(response.mimetype, 'application/json')
+        
+    def test_loads(self):
+        """Test parsing str and bytes"""
+        self.assertEqual(app_module.app.json.loads('{"a": [1, 2]}'), {'a': [1, 2]})
+        self.assertEqual(app_module.app.json.loads(b'{"a": null}'), {'a': None})
+
+
+class TestValidateAndParse(unittest.TestCase):
+    """Test cases for the cached input validation"""
+    
+    def setUp(self):
+        """Start each test with an empty input cache"""
+        patcher = mock.patch.object(app_module, 'input_cache', TTLCache(maxsize=10, ttl=60))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+    def test_repeated_payload_reuses_result(self):
+        """Test that a repeated payload is validated and parsed once"""
+        first = app_module.validate_and_parse(valid_payload())
+        
+        # Same content with keys in another order hits the same entry
+        reordered = valid_payload()
+        reordered['personnel'] = dict(reversed(list(reordered['personnel'].items())))
+        second = app_module.validate_and_parse(reordered)
+        
+        self.assertTrue(first[0]['valid'])
+        self.assertIn('R1_A', first[1]['R1'])
+        self.assertIs(first, second)
+        
+    def test_different_payloads_are_cached_separately(self):
+        """Test that changed input is validated again"""
+        first = app_module.validate_and_parse(valid_payload())
+        
+        changed = valid_payload()
+        changed['personnel']['R1']['R1_A']['rotation_unit'] = 'CR'
+        second = app_module.validate_and_parse(changed)
+        
+        self.assertIsNot(first, second)
+        self.assertFalse(second[0]['valid'])
+        self.assertIsNone(second[1])
+
+
+class TestProgressStream(unittest.TestCase):
+    """Test cases for the progress Server-Sent Events endpoint"""
+    
+    def setUp(self):
+        """Set up test client and shorten heartbeats"""
+        self.client = app_module.app.test_client()
+        patcher = mock.patch.object(app_module.Config, 'SSE_HEARTBEAT_INTERVAL', 0.2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+    def test_unknown_task(self):
+        """Test that streams for unknown tasks are refused"""
+        response = self.client.get('/api/progress-stream/unknown')
+        self.assertEqual(response.status_code, 404)
+        
+    def test_every_stream_receives_every_message(self):
+        """Test that concurrent streams of one task each get progress and done"""
+        task_id = 'test-fanout'
+        app_module.running_tasks[task_id] = {'status': 'running', 'progress': 0}
+        
+        events = {}
+        def follow(name):
+            events[name] = read_events(self.client.get(f'/api/progress-stream/{task_id}'))
+        
+        readers = [threading.Thread(target=follow, args=(name,)) for name in ('first', 'second')]
+        for reader in readers:
+            reader.start()
+        
+        # Wait until both streams are subscribed
+        deadline = time.monotonic() + 5
+        while len(app_module.progress_subscribers.get(task_id, ())) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        
+        app_module.publish_progress(task_id, {'type': 'progress', 'progress': 50, 'generation': 10})
+        app_module.running_tasks[task_id] = {'status': 'completed', 'progress': 100}
+        app_module.publish_progress(task_id, {'type': 'done', 'status': 'completed', 'progress': 100})
+        for reader in readers:
+            reader.join(5)
+        
+        for name in ('first', 'second'):
+            self.assertEqual([event['type'] for event in events[name]], ['progress', 'done'])
+        self.assertNotIn(task_id, app_module.progress_subscribers)
+        
+    def test_finished_task_without_message_ends_stream(self):
+        """Test that a stream reports the final state once the task stops running"""
+        task_id = 'test-finished'
+        app_module.running_tasks[task_id] = {'status': 'running', 'progress': 0}
+        threading.Timer(0.3, app_module.running_tasks.set,
+                        (task_id, {'status': 'failed', 'error': 'boom'})).start()
+        
+        events = read_events(self.client.get(f'/api/progress-stream/{task_id}'))
+        
+        self.assertEqual(events, [{'type': 'done', 'status': 'failed', 'error': 'boom'}])
+
+
+class TestSchedulerQueue(unittest.TestCase):
+    """Test cases for the bounded scheduling queue"""
+    
+    def setUp(self):
+        """Allow a single queued run and hold it until released"""
+        self.release = threading.Event()
+        for name, value in (
+            ('_scheduler_slots', threading.BoundedSemaphore(1)),
+            ('run_schedule_task', lambda *args: self.release.wait(5))
+        ):
+            patcher = mock.patch.object(app_module, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.release.set)
+        
+    def test_full_queue_refuses_runs(self):
+        """Test that submissions beyond the limit get 503 until a slot frees up"""
+        client = app_module.app.test_client()
+        
+        self.assertEqual(client.post('/api/schedule', json=valid_payload()).status_code, 202)
+        
+        response = client.post('/api/schedule', json=valid_payload())
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.get_json()['success'])
+        
+        self.release.set()
+        deadline = time.monotonic() + 5
+        task_id = None
+        while task_id is None and time.monotonic() < deadline:
+            task_id = app_module.submit_schedule_task(None, None)
+            time.sleep(0.01)
+        self.assertIsNotNone(task_id)
+
+
+class TestExpiredTask(unittest.TestCase):
+    """Test cases for a task whose state disappears while it runs"""
+    
+    def test_expired_task_stops(self):
+        """Test that a run whose state was evicted stops and reports expiry"""
+        _, personnel_data = app_module.validate_and_parse(valid_payload())
+        scheduler = app_module.GeneticScheduler(personnel_data=personnel_data, rules=app_module.get_rules())
+        task_id = 'test-expired'
+        subscriber = app_module.subscribe_progress(task_id)
+        self.addCleanup(app_module.unsubscribe_progress, task_id, subscriber)
+        
+        # No state is stored for the task, as after eviction
+        app_module.run_schedule_task(task_id, scheduler, personnel_data)
+        
+        self.assertNotIn(task_id, app_module.running_tasks)
+        self.assertEqual(subscriber.get_nowait(), {'type': 'done', 'status': 'failed', 'error': 'Task expired'})
+
+
+class TestScheduleTaskFlow(unittest.TestCase):
+    """Integration test of a background scheduling task"""
+    
+    def test_schedule_progress_and_downloads(self):
+        """Test 202 response, streamed progress, final state and exports"""
+        client = app_module.app.test_client()
+        
+        response = client.post('/api/schedule', json=valid_payload())
+        self.assertEqual(response.status_code, 202)
+        body = response.get_json()
+        self.assertTrue(body['success'])
+        self.assertEqual(body['status'], 'running')
+        task_id = body['task_id']
+        
+        # The stream stays open until the task is done
+        stream = client.get(f'/api/progress-stream/{task_id}')
+        self.assertEqual(stream.mimetype, 'text/event-stream')
+        events = read_events(stream)
+        self.assertEqual(events[-1]['type'], 'done')
+        self.assertEqual(events[-1]['status'], 'completed')
+        self.assertTrue(all(event['type'] == 'progress' for event in events[:-1]))
+        
+        progress = client.get(f'/api/progress/{task_id}').get_json()
+        self.assertEqual(progress['status'], 'completed')
+        self.assertIn('W1', progress['result']['schedule'])
+        
+        for file_type, filename in progress['files'].items():
+            download = client.get(f'/api/download/{file_type}/{filename}')
+            self.assertEqual(download.status_code, 200)
+            self.assertTrue(download.data.startswith('﻿'.encode('utf-8')))
+        
+        bundle = client.get(f'/api/download/zip/{task_id}')
+        self.assertEqual(bundle.status_code, 200)
+        self.assertTrue(bundle.get_data().startswith(b'PK'))
+        
+        # A stream opened after completion gets the final state at once
+        late_events = read_events(client.get(f'/api/progress-stream/{task_id}'))
+        self.assertEqual(late_events[0]['status'], 'completed')
+        
+    def test_invalid_input_is_rejected(self):
+        """Test that invalid personnel data never starts a task"""
+        payload = valid_payload()
+        payload['personnel']['R1']['R1_A']['rotation_unit'] = 'CR'
+        
+        response = app_module.app.test_client().post('/api/schedule', json=payload)
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.get_json()['success'])
+        
+    def test_unknown_task_progress(self):
+        """Test polling a task that does not exist"""
+        response = app_module.app.test_client().get('/api/progress/unknown')
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
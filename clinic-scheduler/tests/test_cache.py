@@ -0,0 +1,82 @@
+import unittest
+import sys
+import os
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    """Test cases for the in-process TTL/LRU cache"""
+    
+    def setUp(self):
+        """Freeze the cache clock so expiry is deterministic"""
+        self.now = 1000.0
+        patcher = mock.patch('modules.cache.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+    def test_set_and_get(self):
+        """Test storing and reading values"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set('a', 1)
+        cache['b'] = 2
+        
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache['b'], 2)
+        self.assertIsNone(cache.get('missing'))
+        self.assertEqual(cache.get('missing', 'default'), 'default')
+        self.assertIn('a', cache)
+        self.assertNotIn('missing', cache)
+        with self.assertRaises(KeyError):
+            cache['missing']
+        
+    def test_entries_expire_after_ttl(self):
+        """Test that entries older than ttl are dropped"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set('a', 1)
+        
+        self.now += 60
+        self.assertEqual(cache.get('a'), 1)
+        
+        self.now += 1
+        self.assertIsNone(cache.get('a'))
+        self.assertNotIn('a', cache)
+        
+    def test_set_restarts_ttl(self):
+        """Test that overwriting a value restarts its age"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set('a', 1)
+        self.now += 50
+        cache.set('a', 2)
+        self.now += 50
+        
+        self.assertEqual(cache.get('a'), 2)
+        
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that the cache keeps at most maxsize entries, evicting the least recently used"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        
+        # Reading 'a' makes 'b' the least recently used
+        cache.get('a')
+        cache.set('c', 3)
+        
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        
+    def test_pop(self):
+        """Test removing entries"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set('a', 1)
+        
+        self.assertEqual(cache.pop('a'), 1)
+        self.assertNotIn('a', cache)
+        self.assertEqual(cache.pop('a', 'default'), 'default')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_handler import DataHandler, thaw_rules
+
+
+class TestCsvValidation(unittest.TestCase):
+    """Test cases for personnel CSV validation"""
+    
+    def test_valid_csv(self):
+        """Test that a well-formed CSV passes with its rows"""
+        csv_content = "Person,Level,Rotation_Unit\nA,R1,健康\nB,R3,CR\n"
+        result = DataHandler.validate_csv_format(csv_content)
+        
+        self.assertTrue(result['valid'])
+        self.assertEqual(result['row_count'], 2)
+        self.assertEqual(result['data'][0]['Rotation_Unit'], '健康')
+        
+    def test_invalid_level(self):
+        """Test that unknown levels are rejected"""
+        csv_content = "Person,Level,Rotation_Unit\nA,R9,健康\n"
+        result = DataHandler.validate_csv_format(csv_content)
+        
+        self.assertFalse(result['valid'])
+        self.assertIn('Invalid levels found: R9', result['errors'])
+        
+    def test_blank_level(self):
+        """Test that a row without a level is rejected"""
+        csv_content = "Person,Level,Rotation_Unit\nA,R1,健康\nB,,CR\n"
+        result = DataHandler.validate_csv_format(csv_content)
+        
+        self.assertFalse(result['valid'])
+        self.assertIn('Row 2: Missing level', result['errors'])
+        self.assertIsNone(result['data'])
+        
+    def test_invalid_rotation_unit(self):
+        """Test that a unit outside the level's rotation units is rejected"""
+        csv_content = "Person,Level,Rotation_Unit\nA,R1,CR\n"
+        result = DataHandler.validate_csv_format(csv_content)
+        
+        self.assertFalse(result['valid'])
+        self.assertIn("Row 1: Invalid rotation unit 'CR' for R1", result['errors'])
+        
+    def test_missing_column(self):
+        """Test that a CSV without a required column is rejected"""
+        csv_content = "Person,Level\nA,R1\n"
+        result = DataHandler.validate_csv_format(csv_content)
+        
+        self.assertFalse(result['valid'])
+        self.assertIn('Rotation_Unit', result['error'])
+
+
+
+class TestRules(unittest.TestCase):
+    """Test cases for the shared read-only rules"""
+    
+    def assert_read_only(self, rules):
+        """Assert that nested rule tables cannot be changed in place"""
+        with self.assertRaises(TypeError):
+            rules['unit_constraints']['新單位'] = {}
+        with self.assertRaises(TypeError):
+            rules['unit_constraints']['健康']['max_clinics'] = 9
+        with self.assertRaises(AttributeError):
+            rules['general_rules']['health_check_priority'].append('R5')
+        
+    def test_default_rules_are_read_only(self):
+        """Test that the shared default rules are frozen at every level"""
+        rules = DataHandler.get_default_rules()
+        
+        self.assert_read_only(rules)
+        self.assertEqual(rules['unit_constraints']['健康']['max_clinics'], 2)
+        
+    def test_loaded_rules_are_read_only(self):
+        """Test that rules read from a file are frozen at every level"""
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'rules.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('{"unit_constraints": {"健康": {"max_clinics": 2}}, '
+                        '"general_rules": {"health_check_priority": ["R1"]}}')
+            rules = DataHandler.load_rules_from_json(path)
+        
+        self.assert_read_only(rules)
+        self.assertEqual(rules['general_rules']['health_check_priority'], ('R1',))
+        
+    def test_thawed_rules_are_plain_copies(self):
+        """Test that thawed rules are mutable dicts independent of the shared ones"""
+        rules = thaw_rules(DataHandler.get_default_rules())
+        rules['unit_constraints']['健康']['max_clinics'] = 9
+        
+        self.assertIsInstance(rules['unit_constraints'], dict)
+        self.assertEqual(DataHandler.get_default_rules()['unit_constraints']['健康']['max_clinics'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.fitness_evaluator import FitnessEvaluator
+
+
+def person(person_id, level, rotation_unit, **flags):
+    """Personnel entry shaped like GeneticSchedulerV2.personnel_list"""
+    return {
+        'id': person_id,
+        'name': '',
+        'level': level,
+        'rotation_unit': rotation_unit,
+        'health_check': flags.get('health_check', False),
+        'tuesday_teaching': flags.get('tuesday_teaching', False),
+        'fixed_schedule': flags.get('fixed_schedule')
+    }
+
+
+class TestFitnessEvaluator(unittest.TestCase):
+    """Test cases for schedule scores and violation messages
+
+    Each test evaluates a single day, so the expected score is coverage of
+    that day's required rooms (13 on Monday, 10 on Tuesday), plus 20 for one
+    busy person, minus every penalty. An empty required room costs 1000 and
+    an empty health check room another 500.
+    """
+
+    def evaluate(self, personnel, day, schedule):
+        """Evaluate a one-day schedule, checking the fast path agrees"""
+        evaluator = FitnessEvaluator(personnel, [day], ['Morning', 'Afternoon'])
+        score, violations = evaluator.evaluate(schedule)
+        self.assertEqual(evaluator.evaluate_fast(schedule), score)
+        return score, violations
+
+    def test_empty_schedule(self):
+        """Test that every required room is reported empty"""
+        score, violations = self.evaluate([], 'Monday', {})
+
+        self.assertEqual(score, -13 * 1000 - 3 * 500)
+        self.assertIn('Required room 4201 is empty on Monday Morning', violations['hard_violations'])
+        self.assertIn('體檢2 is empty on Monday Morning', violations['hard_violations'])
+        self.assertEqual(len(violations['hard_violations']), 16)
+
+    def test_health_r1_may_work_full_day(self):
+        """Test that R1 健康 works morning and afternoon without the full-day penalty"""
+        schedule = {'Monday': {'Morning': {'體檢1': 'R1_H'}, 'Afternoon': {'4204': 'R1_H'}}}
+
+        score, violations = self.evaluate(
+            [person('R1_H', 'R1', '健康', health_check=True)], 'Monday', schedule
+        )
+
+        # Only the weekly total of 8 health checks is missed
+        self.assertAlmostEqual(score, 2 / 13 * 100 + 20 - 11 * 1000 - 2 * 500 - 800)
+        self.assertIn(
+            'R1_H (健康) must have exactly 8 health check assignments, has 1',
+            violations['hard_violations']
+        )
+        self.assertNotIn('R1_H assigned both morning and afternoon on Monday', violations['hard_violations'])
+
+    def test_other_r1_full_day_is_penalized(self):
+        """Test that other R1 units get the full-day penalty for the same slots"""
+        schedule = {'Monday': {'Morning': {'體檢1': 'R1_W'}, 'Afternoon': {'4204': 'R1_W'}}}
+
+        score, violations = self.evaluate(
+            [person('R1_W', 'R1', '內科病房', health_check=True)], 'Monday', schedule
+        )
+
+        self.assertAlmostEqual(score, 2 / 13 * 100 + 20 - 11 * 1000 - 2 * 500 - 800)
+        self.assertIn('R1_W assigned both morning and afternoon on Monday', violations['hard_violations'])
+
+    def test_r4_fixed_slot(self):
+        """Test that a fixed R4 must work its slot and nothing else"""
+        fixed = person('R4_F', 'R4', '睡眠門診', fixed_schedule={'day': 'Monday', 'time_slot': 'Morning'})
+
+        score, violations = self.evaluate([fixed], 'Monday', {'Monday': {'Morning': {'4203': 'R4_F'}}})
+        self.assertAlmostEqual(score, 1 / 13 * 100 + 20 - 12 * 1000 - 3 * 500)
+        self.assertFalse([v for v in violations['hard_violations'] if v.startswith('R4_F')])
+
+        score, violations = self.evaluate([fixed], 'Monday', {'Monday': {'Afternoon': {'4202': 'R4_F'}}})
+        self.assertAlmostEqual(score, 1 / 13 * 100 + 20 - 12 * 1000 - 3 * 500 - 1000 - 800 - 200)
+        self.assertIn('R4_F (R4) must work on Monday Morning as specified', violations['hard_violations'])
+        self.assertIn(
+            'R4_F (R4) with fixed schedule should only work at Monday Morning',
+            violations['hard_violations']
+        )
+        self.assertIn('R4_F must have at least one morning clinic', violations['hard_violations'])
+
+    def test_r4_tuesday_teaching(self):
+        """Test that a teaching R4 is penalized for any Tuesday clinic"""
+        schedule = {'Tuesday': {'Morning': {'4207': 'R4_T'}}}
+
+        score, violations = self.evaluate(
+            [person('R4_T', 'R4', '旅遊門診', tuesday_teaching=True)], 'Tuesday', schedule
+        )
+        self.assertAlmostEqual(score, 10 + 20 - 9 * 1000 - 3 * 500 - 500)
+        self.assertIn('R4_T has teaching on Tuesday, cannot have clinics', violations['hard_violations'])
+
+        score, violations = self.evaluate([person('R4_T', 'R4', '旅遊門診')], 'Tuesday', schedule)
+        self.assertAlmostEqual(score, 10 + 20 - 9 * 1000 - 3 * 500)
+
+    def test_4201_only_for_r2_and_r3(self):
+        """Test that 4201 given to an R4 is a violation"""
+        schedule = {'Monday': {'Morning': {'4201': 'R4_A'}}}
+
+        score, violations = self.evaluate([person('R4_A', 'R4', '睡眠門診')], 'Monday', schedule)
+
+        self.assertAlmostEqual(score, 1 / 13 * 100 + 20 - 12 * 1000 - 3 * 500 - 600)
+        self.assertIn(
+            '4201 on Monday Morning assigned to R4_A (R4), must be R2 or R3',
+            violations['hard_violations']
+        )
+
+    def test_r2_needs_exactly_one_4201(self):
+        """Test the R2/R3 rule of exactly one 4201 clinic"""
+        r2 = [person('R2_A', 'R2', '婦產門診')]
+
+        score, violations = self.evaluate(r2, 'Monday', {
+            'Monday': {'Morning': {'4201': 'R2_A'}, 'Afternoon': {'4202': 'R2_A'}}
+        })
+        # One morning and one afternoon clinic; only the full day is a violation
+        self.assertAlmostEqual(score, 2 / 13 * 100 + 20 - 11 * 1000 - 3 * 500 - 800)
+        self.assertFalse([v for v in violations['hard_violations'] if '4201 clinic' in v])
+
+        score, violations = self.evaluate(r2, 'Monday', {'Monday': {'Morning': {'4203': 'R2_A'}}})
+        self.assertAlmostEqual(score, 1 / 13 * 100 + 20 - 12 * 1000 - 3 * 500 - 300)
+        self.assertIn('R2_A must have exactly one 4201 clinic, has 0', violations['hard_violations'])
+
+        score, violations = self.evaluate(r2, 'Monday', {
+            'Monday': {'Morning': {'4201': 'R2_A'}, 'Afternoon': {'4201': 'R2_A'}}
+        })
+        self.assertAlmostEqual(score, 2 / 13 * 100 + 20 - 11 * 1000 - 3 * 500 - 800 - 300)
+        self.assertIn('R2_A must have exactly one 4201 clinic, has 2', violations['hard_violations'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.genetic_scheduler import GeneticScheduler
+
+# Chromosome axes: week, day, time slot, room (10 clinic rooms, then 體檢1 and 體檢2)
+MONDAY, TUESDAY, WEDNESDAY = 0, 1, 2
+MORNING, AFTERNOON = 0, 1
+HEALTH1, HEALTH2 = 10, 11
+
+# Personnel indices, in personnel_list order
+HEALTH_R1, HEALTH_R2, TEACHING_R4, CR_R3 = 0, 1, 2, 3
+
+
+def distribution_score(counts):
+    """Expected evenness bonus for per-person assignment counts"""
+    return max(0.0, 50 * (1 - np.std(counts) / np.mean(counts)))
+
+
+class TestGeneticScheduler(unittest.TestCase):
+    """Test cases for the numpy genetic scheduler"""
+
+    def setUp(self):
+        """Set up four people and a clinic limit for the CR unit"""
+        personnel = {
+            'R1': {'R1_A': {'rotation_unit': '健康', 'health_check': True}},
+            'R2': {'R2_A': {'rotation_unit': '婦產門診', 'health_check': True}},
+            'R4': {'R4_A': {'rotation_unit': '睡眠門診', 'health_check': False, 'tuesday_teaching': True}},
+            'R3': {'R3_A': {'rotation_unit': 'CR', 'health_check': True}}
+        }
+        rules = {'unit_constraints': {'CR': {'min_clinics': 2, 'max_clinics': 3}}}
+        self.scheduler = GeneticScheduler(personnel, rules, population_size=20, generations=15)
+
+    def baseline(self):
+        """Chromosome with both health check rooms covered and every clinic empty"""
+        chromosome = np.full((1, 5, 2, 12), -1, dtype=int)
+        chromosome[..., HEALTH1] = HEALTH_R1
+        chromosome[..., HEALTH2] = HEALTH_R2
+        return chromosome
+
+    def test_empty_chromosome(self):
+        """Test penalties for 20 empty health check rooms and the unmet CR minimum"""
+        chromosome = np.full((1, 5, 2, 12), -1, dtype=int)
+
+        # 20 * 20 empty health rooms + 10 * 2 clinics below the minimum
+        self.assertAlmostEqual(self.scheduler.fitness(chromosome), -420)
+
+    def test_baseline(self):
+        """Test that covered health check rooms leave only the CR minimum penalty"""
+        # Counts [10, 10, 0, 0] have std equal to the mean, so no distribution bonus
+        self.assertAlmostEqual(self.scheduler.fitness(self.baseline()), -20)
+
+    def test_double_booking(self):
+        """Test one penalty per double-booked slot, however many rooms repeat"""
+        chromosome = self.baseline()
+        chromosome[0, MONDAY, MORNING, [0, 1]] = HEALTH_R1
+
+        # 2% coverage; counts [12, 10, 0, 0] get no distribution bonus
+        self.assertAlmostEqual(self.scheduler.fitness(chromosome), 2 - 100 - 20)
+
+    def test_health_check_room_needs_qualified_person(self):
+        """Test the penalty for a health check room given to someone without health_check"""
+        chromosome = self.baseline()
+        chromosome[0, MONDAY, MORNING, HEALTH2] = TEACHING_R4
+
+        expected = distribution_score([10, 9, 1, 0]) - 50 - 20
+        self.assertAlmostEqual(self.scheduler.fitness(chromosome), expected)
+
+    def test_tuesday_teaching(self):
+        """Test the penalty for each Tuesday slot given to a teaching R4"""
+        chromosome = self.baseline()
+        chromosome[0, TUESDAY, :, 0] = TEACHING_R4
+
+        expected = 2 + distribution_score([10, 10, 2, 0]) - 2 * 100 - 20
+        self.assertAlmostEqual(self.scheduler.fitness(chromosome), expected)
+
+    def test_clinic_count_limits(self):
+        """Test that counts inside the unit range are free and each one beyond costs 10"""
+        within = self.baseline()
+        within[0, MONDAY, :, 0] = CR_R3
+        self.assertAlmostEqual(self.scheduler.fitness(within), 2 + distribution_score([10, 10, 0, 2]))
+
+        over = self.baseline()
+        over[0, [MONDAY, WEDNESDAY], :, 0] = CR_R3
+        over[0, TUESDAY, MORNING, 0] = CR_R3
+        expected = 5 + distribution_score([10, 10, 0, 5]) - 2 * 10
+        self.assertAlmostEqual(self.scheduler.fitness(over), expected)
+
+    def test_tournament_selection_returns_fitter_chromosome(self):
+        """Test that tournaments pick a population member and favour higher fitness"""
+        population = np.stack([np.full((1, 5, 2, 12), value, dtype=int) for value in range(3)])
+        self.scheduler.rng = np.random.default_rng(0)
+
+        winners = [self.scheduler.tournament_selection(population, [1.0, 5.0, 3.0]) for _ in range(20)]
+
+        self.assertTrue(all(winner.shape == (1, 5, 2, 12) for winner in winners))
+        self.assertNotIn(0, {int(winner[0, 0, 0, 0]) for winner in winners})
+
+    def test_run_keeps_elites(self):
+        """Test run() output and that each generation starts with the last one's elites"""
+        self.scheduler.convergence_threshold = self.scheduler.generations
+        evaluated = []
+        fitness = self.scheduler.fitness
+        def record(chromosome):
+            evaluated.append((chromosome.tobytes(), fitness(chromosome)))
+            return evaluated[-1][1]
+        self.scheduler.fitness = record
+
+        result = self.scheduler.run()
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['generations'], 15)
+        self.assertEqual(set(result['schedule']), {'W1'})
+        for time_slots in result['schedule']['W1'].values():
+            for rooms in time_slots.values():
+                self.assertEqual(len(rooms), 12)
+
+        generations = [evaluated[i:i + 20] for i in range(0, len(evaluated), 20)]
+        self.assertEqual(len(generations), 15)
+        elite_size = self.scheduler.elite_size
+        for previous, current in zip(generations, generations[1:]):
+            elites = [previous[i][0] for i in np.argsort([score for _, score in previous])[-elite_size:]]
+            self.assertEqual([chromosome for chromosome, _ in current[:elite_size]], elites)
+
+        best_per_generation = [max(score for _, score in generation) for generation in generations]
+        self.assertTrue(np.all(np.diff(best_per_generation) >= 0))
+        self.assertEqual(result['fitness'], best_per_generation[-1])
+        self.assertEqual(result['fitness'], fitness(self.scheduler.best_solution))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import sys
+import os
+import queue
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.genetic_scheduler_v2 import GeneticSchedulerV2, run_scheduler
+from modules.data_handler import DataHandler
+
+
+class TestGeneticSchedulerV2(unittest.TestCase):
+    """Test cases for the dict-based genetic scheduler"""
+    
+    def setUp(self):
+        """Set up a small scheduler"""
+        personnel = DataHandler.parse_personnel_data({
+            'personnel': {
+                'R1': {'R1_A': {'rotation_unit': '健康', 'health_check': True}},
+                'R2': {'R2_A': {'rotation_unit': '婦產門診', 'health_check': True}},
+                'R3': {'R3_A': {'rotation_unit': 'CR', 'health_check': False}},
+                'R4': {'R4_A': {'rotation_unit': '睡眠門診', 'health_check': False}}
+            }
+        })
+        self.scheduler = GeneticSchedulerV2(personnel, DataHandler.get_default_rules())
+        
+    def test_fitness_cache_distinguishes_days(self):
+        """Test that schedules with the same slots under different days never share a cached score"""
+        schedule = self.scheduler._create_initial_schedule()
+        
+        # Same assignments in the same order, but Monday's slots now belong to Tuesday and vice versa
+        relabel = {'Monday': 'Tuesday', 'Tuesday': 'Monday'}
+        swapped = {relabel.get(day, day): day_schedule for day, day_schedule in schedule.items()}
+        self.assertNotEqual(
+            self.scheduler.fitness_evaluator.evaluate_fast(swapped),
+            self.scheduler.fitness_evaluator.evaluate_fast(schedule)
+        )
+        
+        self.scheduler.fitness(schedule)
+        self.assertEqual(
+            self.scheduler.fitness(swapped),
+            self.scheduler.fitness_evaluator.evaluate_fast(swapped)
+        )
+        
+    def test_fitness_reuses_identical_schedule(self):
+        """Test that an identical schedule is scored from the cache"""
+        schedule = self.scheduler._create_initial_schedule()
+        score = self.scheduler.fitness(schedule)
+        
+        self.assertEqual(self.scheduler.fitness(self.scheduler._copy_schedule(schedule)), score)
+        self.assertEqual(len(self.scheduler._fitness_cache), 1)
+        
+    def test_stop_event_ends_run_early(self):
+        """Test that a set stop event ends evolution after the current generation"""
+        progress_queue = queue.Queue()
+        stop_event = threading.Event()
+        stop_event.set()
+        
+        result = run_scheduler(self.scheduler, progress_queue, stop_event=stop_event)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(progress_queue.qsize(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()